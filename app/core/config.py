@@ -7,11 +7,16 @@ all configuration values.
 """
 
 import os
+from functools import cached_property, lru_cache
 from typing import Literal, Optional
 
 from pydantic import BaseModel, Field, field_validator, model_validator
 from pydantic_settings import BaseSettings
 
+_ALLOWED_MODEL_SIZES = frozenset({"tiny", "base", "small", "medium", "large", "large-v2", "large-v3"})
+_ALLOWED_COMPUTE_TYPES = frozenset({"float16", "float32", "int8", "int8_float16"})
+_CT2_DEFAULT_CPU_THREADS = 4  # CTranslate2 intra-op threads when whisper_cpu_threads is 0
+
 
 class Settings(BaseSettings):
     """
@@ -30,12 +35,31 @@ class Settings(BaseSettings):
     # Server settings
     host: str = Field(default="127.0.0.1", description="Server host")
     port: int = Field(default=8000, description="Server port")
+    web_concurrency: int = Field(
+        default=1,
+        description="Number of Gunicorn worker processes sharing the CPU cores"
+    )
     
     # Whisper model settings
     model_size: str = Field(default="small", description="Whisper model size")
     device: Literal["cpu", "cuda"] = Field(default="cuda", description="Device for inference")
     compute_type: str = Field(default="float16", description="Compute type for inference")
     load_model_on_startup: bool = Field(default=True, description="Load Whisper model during app startup")
+    warmup_on_startup: bool = Field(default=True, description="Run a dummy transcription after loading the model on startup")
+    whisper_num_workers: Optional[int] = Field(
+        default=None,
+        description="Number of faster-whisper workers able to transcribe concurrently "
+                    "(default: as many as each server process's share of the CPU cores "
+                    "fits at whisper_cpu_threads each)"
+    )
+    whisper_cpu_threads: int = Field(
+        default=0,
+        description="CTranslate2 intra-op threads on CPU (0 uses the library default)"
+    )
+    whisper_batch_size: int = Field(
+        default=8,
+        description="Speech chunks decoded per forward pass of the batched pipeline"
+    )
     
     # File upload settings
     max_file_size_mb: int = Field(default=50, description="Maximum file size in MB")
@@ -44,20 +68,46 @@ class Settings(BaseSettings):
         description="Comma-separated string of allowed audio file extensions"
     )
     
+    # CORS settings
+    cors_origins: str = Field(
+        default="*",
+        description="Comma-separated string of origins allowed to make cross-origin requests"
+    )
+    
     # Performance settings
     max_workers: Optional[int] = Field(default=None, description="Max thread pool workers")
+    threadpool_max_threads: int = Field(
+        default=40,
+        description="Threads available to async routes for blocking calls such as Redis I/O"
+    )
     beam_size: int = Field(default=5, description="Beam size for transcription")
     
+    # Profiling settings
+    profiling_enabled: bool = Field(default=False, description="Allow profiling requests with ?profile=1 (requires pyinstrument)")
+    
     # Logging settings
     log_level: str = Field(default="INFO", description="Logging level")
     log_format: str = Field(
         default="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
         description="Log format string"
     )
+    log_sample_rate: float = Field(
+        default=1.0, ge=0.0, le=1.0,
+        description="Fraction of requests logged by the request timing middleware"
+    )
+
+    # Redis settings
+    redis_host: str = Field(default="localhost", description="Redis server host")
+    redis_port: int = Field(default=6379, description="Redis server port")
+    redis_max_connections: int = Field(default=32, description="Maximum connections in the Redis connection pool")
 
     # Batch worker settings
     batch_size: int = Field(default=8, description="Number of jobs to process in a batch")
     batch_timeout: int = Field(default=5, description="Seconds to wait for more jobs before processing a batch")
+
+    # Real-time (websocket) batching settings
+    stream_batch_size: int = Field(default=8, description="Maximum speech segments transcribed together across connections")
+    stream_batch_wait_ms: int = Field(default=100, description="Milliseconds to wait for more segments before transcribing a batch")
     
 
 
@@ -65,18 +115,16 @@ class Settings(BaseSettings):
     @classmethod
     def validate_model_size(cls, v):
         """Validate that the model size is supported."""
-        allowed_sizes = ["tiny", "base", "small", "medium", "large", "large-v2", "large-v3"]
-        if v not in allowed_sizes:
-            raise ValueError(f"Model size must be one of: {allowed_sizes}")
+        if v not in _ALLOWED_MODEL_SIZES:
+            raise ValueError(f"Model size must be one of: {sorted(_ALLOWED_MODEL_SIZES)}")
         return v
     
     @field_validator("compute_type")
     @classmethod
     def validate_compute_type(cls, v):
         """Validate compute type based on device."""
-        allowed_types = ["float16", "float32", "int8", "int8_float16"]
-        if v not in allowed_types:
-            raise ValueError(f"Compute type must be one of: {allowed_types}")
+        if v not in _ALLOWED_COMPUTE_TYPES:
+            raise ValueError(f"Compute type must be one of: {sorted(_ALLOWED_COMPUTE_TYPES)}")
         return v
 
     @model_validator(mode="after")
@@ -90,6 +138,20 @@ class Settings(BaseSettings):
             object.__setattr__(self, "compute_type", "float32")
         return self
     
+    @model_validator(mode="after")
+    def default_whisper_num_workers(self):
+        """Derive the number of faster-whisper workers from the CPU cores when unset.
+
+        Every worker runs `whisper_cpu_threads` CTranslate2 threads and every
+        one of the `web_concurrency` server processes has its own workers, so
+        the default keeps processes * workers * threads within the available cores.
+        """
+        if self.whisper_num_workers is None:
+            threads = self.whisper_cpu_threads or _CT2_DEFAULT_CPU_THREADS
+            cores = (os.cpu_count() or 1) // max(1, self.web_concurrency)
+            object.__setattr__(self, "whisper_num_workers", max(1, cores // threads))
+        return self
+    
     @field_validator("max_file_size_mb")
     @classmethod
     def validate_max_file_size(cls, v):
@@ -108,10 +170,19 @@ class Settings(BaseSettings):
             )
         return self
     
-    @property
-    def parsed_allowed_extensions(self) -> list[str]:
-        """Return a list of allowed extensions from the comma-separated string."""
-        return [ext.strip() for ext in self.allowed_extensions.split(',')]
+    @cached_property
+    def parsed_allowed_extensions(self) -> frozenset[str]:
+        """Return the set of allowed extensions parsed once from the comma-separated string."""
+        return frozenset(
+            ext.strip().lower().lstrip('.')
+            for ext in self.allowed_extensions.split(',')
+            if ext.strip()
+        )
+
+    @cached_property
+    def parsed_cors_origins(self) -> list[str]:
+        """Return the list of allowed CORS origins parsed once from the comma-separated string."""
+        return [origin.strip() for origin in self.cors_origins.split(',') if origin.strip()]
 
     @property
     def max_file_size_bytes(self) -> int:
@@ -125,18 +196,17 @@ class Settings(BaseSettings):
     }
 
 
-# Global settings instance
-settings = Settings()
-
-
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
     """
     Dependency function to get settings instance.
     
-    This function can be used as a FastAPI dependency to inject
-    settings into route handlers and other functions.
+    The settings are built lazily on first access and cached, so the
+    environment is parsed and validated only once per process. This
+    function can be used as a FastAPI dependency to inject settings
+    into route handlers and other functions.
     
     Returns:
-        Settings: The global settings instance
+        Settings: The cached settings instance
     """
-    return settings
+    return Settings()
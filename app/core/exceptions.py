@@ -10,7 +10,7 @@ import logging
 from typing import Any, Dict
 
 from fastapi import HTTPException, Request, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 
 from .logging import get_logger
 
@@ -47,7 +47,7 @@ class FileValidationException(STTException):
         super().__init__(message, status.HTTP_400_BAD_REQUEST)
 
 
-async def stt_exception_handler(request: Request, exc: STTException) -> JSONResponse:
+async def stt_exception_handler(request: Request, exc: STTException) -> ORJSONResponse:
     """
     Handle custom STT exceptions.
     
@@ -56,21 +56,21 @@ async def stt_exception_handler(request: Request, exc: STTException) -> JSONResp
         exc: The STT exception that was raised
         
     Returns:
-        JSONResponse: A JSON response with error details
+        ORJSONResponse: A JSON response with error details
     """
-    logger.error(f"STT Exception: {exc.message}", extra={
+    logger.error("STT Exception: %s", exc.message, extra={
         "status_code": exc.status_code,
         "path": request.url.path,
         "method": request.method
     })
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={"detail": exc.message}
     )
 
 
-async def http_exception_handler(request: Request, exc: HTTPException) -> JSONResponse:
+async def http_exception_handler(request: Request, exc: HTTPException) -> ORJSONResponse:
     """
     Handle HTTP exceptions with consistent logging.
     
@@ -79,43 +79,16 @@ async def http_exception_handler(request: Request, exc: HTTPException) -> JSONRe
         exc: The HTTP exception that was raised
         
     Returns:
-        JSONResponse: A JSON response with error details
+        ORJSONResponse: A JSON response with error details
     """
-    logger.warning(f"HTTP Exception: {exc.detail}", extra={
+    logger.warning("HTTP Exception: %s", exc.detail, extra={
         "status_code": exc.status_code,
         "path": request.url.path,
         "method": request.method
     })
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={"detail": exc.detail}
     )
 
-
-async def general_exception_handler(request: Request, exc: Exception) -> JSONResponse:
-    """
-    Handle unexpected exceptions with safe error responses.
-    
-    This handler ensures that internal server errors don't expose
-    sensitive information while logging the full exception details
-    for debugging purposes.
-    
-    Args:
-        request: The FastAPI request object
-        exc: The unexpected exception that was raised
-        
-    Returns:
-        JSONResponse: A safe JSON response for internal server errors
-    """
-    logger.error(f"Unexpected error: {str(exc)}", extra={
-        "path": request.url.path,
-        "method": request.method,
-        "exception_type": type(exc).__name__
-    }, exc_info=True)
-    
-    # Never expose internal error details to users
-    return JSONResponse(
-        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-        content={"detail": "An internal server error occurred. Please try again later."}
-    )
@@ -36,6 +36,11 @@ def setup_logging(log_level: Optional[str] = None) -> None:
         ]
     )
     
+    # Skip per-record thread/process lookups unless the format uses them
+    logging.logThreads = "(thread" in settings.log_format
+    logging.logProcesses = "(process" in settings.log_format
+    logging.logMultiprocessing = "(processName" in settings.log_format
+    
     # Configure specific loggers
     # Reduce noise from external libraries
     logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
@@ -7,19 +7,36 @@ from rq import Queue
 
 from app.core.config import get_settings
 
-settings = get_settings()
-
-# Global Redis connection and queue
+# Global Redis connection pool, connection and queue
+_redis_pool = None
 _redis_conn = None
 _rq_queue = None
 
+def get_redis_pool() -> redis.BlockingConnectionPool:
+    """
+    Get a singleton Redis connection pool shared by all Redis clients.
+
+    When all connections are in use, callers wait for one to be released
+    instead of failing, and idle connections are kept alive with TCP
+    keepalive so they don't need to be re-established between jobs.
+    """
+    global _redis_pool
+    if _redis_pool is None:
+        settings = get_settings()
+        _redis_pool = redis.BlockingConnectionPool.from_url(
+            f'redis://{settings.redis_host}:{settings.redis_port}',
+            max_connections=settings.redis_max_connections,
+            socket_keepalive=True
+        )
+    return _redis_pool
+
 def get_redis_connection() -> redis.Redis:
     """
-    Get a singleton Redis connection.
+    Get a singleton Redis connection backed by the shared pool.
     """
     global _redis_conn
     if _redis_conn is None:
-        _redis_conn = redis.from_url(f'redis://{settings.redis_host}:{settings.redis_port}')
+        _redis_conn = redis.Redis(connection_pool=get_redis_pool())
     return _redis_conn
 
 def get_queue() -> Queue:
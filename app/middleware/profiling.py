@@ -0,0 +1,43 @@
+"""
+Request profiling middleware.
+
+This module provides an opt-in pure ASGI middleware that profiles a
+request with pyinstrument when its query string contains `profile=1`,
+and returns the profiler's HTML report instead of the normal response.
+It is only installed when profiling is enabled in the settings, so
+pyinstrument is only needed in that case.
+"""
+
+from urllib.parse import parse_qs
+
+from pyinstrument import Profiler
+from starlette.responses import HTMLResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class ProfilingMiddleware:
+    """
+    Profile requests that ask for it with `?profile=1`.
+    
+    The profiler runs in async mode, so time spent awaiting (for example
+    on the inference thread pool) is attributed to the awaiting coroutine.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or parse_qs(scope["query_string"].decode()).get("profile") != ["1"]:
+            await self.app(scope, receive, send)
+            return
+
+        async def discard(message: Message) -> None:
+            pass  # The profile report replaces the endpoint's response
+
+        profiler = Profiler(async_mode="enabled")
+        profiler.start()
+        try:
+            await self.app(scope, receive, discard)
+        finally:
+            profiler.stop()
+        await HTMLResponse(profiler.output_html())(scope, receive, send)
@@ -0,0 +1,66 @@
+"""
+Request timing middleware.
+
+This module provides a pure ASGI middleware that logs the method, path,
+status code and processing time of every HTTP request. Unlike a
+`@app.middleware("http")` function, it does not wrap requests in
+Starlette's BaseHTTPMiddleware, so no task group or Request/Response
+objects are created per request.
+"""
+
+import random
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Liveness and health probes are hit constantly and never logged
+UNLOGGED_PATHS = frozenset({"/", "/ping", "/api/v1/health"})
+
+
+class RequestTimingMiddleware:
+    """
+    Log incoming requests for monitoring and debugging.
+    
+    The status code is read from the `http.response.start` message, and
+    the processing time is measured up to that point. Only a
+    `sample_rate` fraction of requests is logged, and probe paths are
+    never logged.
+    """
+
+    def __init__(self, app: ASGIApp, sample_rate: float = 1.0):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["path"] in UNLOGGED_PATHS
+            or random.random() >= self.sample_rate
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                process_time = time.perf_counter() - start_time
+                method, path, status_code = scope["method"], scope["path"], message["status"]
+                client = scope.get("client")
+                logger.info(
+                    "%s %s - Status: %d - Time: %.3fs", method, path, status_code, process_time,
+                    extra={
+                        "method": method,
+                        "path": path,
+                        "status_code": status_code,
+                        "process_time": process_time,
+                        "client_ip": client[0] if client else "unknown"
+                    }
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
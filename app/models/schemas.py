@@ -5,7 +5,7 @@ This module defines the data models used for API communication,
 ensuring type safety and automatic validation of request/response data.
 """
 
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -147,5 +147,11 @@ class JobStatusResponse(BaseModel):
     Response model for checking the status of a job.
     """
     job_id: str = Field(..., description="The unique ID for the transcription job.")
-    status: str = Field(..., description="The current status of the job (e.g., queued, started, finished, failed).")
+    status: Literal[
+        "queued", "started", "deferred", "scheduled", "finished", "failed", "stopped", "canceled", "not_found"
+    ] = Field(
+        ...,
+        description="The current status of the job; `not_found` when a job requested from /jobs "
+                    "does not exist or has expired."
+    )
     result: Optional[TranscriptionResponse] = Field(None, description="The transcription result, available if the job is finished.")
@@ -7,10 +7,12 @@ transcription operations.
 """
 
 import asyncio
+import functools
 import threading
 from typing import Optional
 
-from faster_whisper import WhisperModel
+import numpy as np
+from faster_whisper import BatchedInferencePipeline, WhisperModel
 
 from ..core.config import get_settings
 from ..core.exceptions import ModelLoadException
@@ -21,33 +23,23 @@ logger = get_logger(__name__)
 
 class WhisperModelManager:
     """
-    Singleton class for managing the Whisper model instance.
+    Manager for the Whisper model instance.
     
     This class ensures that the expensive model loading operation
-    happens only once during application startup, and provides
-    thread-safe access to the model for concurrent requests.
+    happens only once during application startup. A single instance
+    is shared per process through `get_model_manager()`, and readiness
+    checks are lock-free so they stay cheap on hot paths.
     """
     
-    _instance: Optional['WhisperModelManager'] = None
-    _lock = threading.Lock()
-    
-    def __new__(cls) -> 'WhisperModelManager':
-        """Implement singleton pattern."""
-        if cls._instance is None:
-            with cls._lock:
-                if cls._instance is None:
-                    cls._instance = super().__new__(cls)
-        return cls._instance
-    
     def __init__(self):
         """Initialize the model manager."""
-        if not hasattr(self, '_initialized'):
-            self._model: Optional[WhisperModel] = None
-            self._model_lock = threading.RLock()
-            self._initialized = True
-            self._settings = get_settings()
+        self._model: Optional[WhisperModel] = None
+        self._batched_pipeline: Optional[BatchedInferencePipeline] = None
+        self._loaded = threading.Event()
+        self._load_lock = threading.Lock()
+        self._settings = get_settings()
     
-    def load_model(self) -> None:
+    def load_model(self, sequential: bool = False) -> None:
         """
         Load the Whisper model with configured settings.
         
@@ -55,28 +47,49 @@ class WhisperModelManager:
         It loads the model with the specified device and compute type
         for optimal performance.
         
+        Args:
+            sequential: Whether the process transcribes one input at a time,
+                       as the RQ workers do. Unless WHISPER_NUM_WORKERS is set
+                       explicitly, a single model worker is loaded then, since
+                       more would only cost memory.
+        
         Raises:
             ModelLoadException: If model loading fails
         """
-        if self._model is not None:
+        if self._loaded.is_set():
             logger.info("Model already loaded")
             return
         
-        with self._model_lock:
-            if self._model is not None:
+        # Only serializes concurrent loaders; readers never take this lock
+        with self._load_lock:
+            if self._loaded.is_set():
                 return
             
+            num_workers = self._settings.whisper_num_workers
+            if sequential and "whisper_num_workers" not in self._settings.model_fields_set:
+                num_workers = 1
+            
             try:
                 logger.info(f"Loading Whisper model: {self._settings.model_size}")
                 logger.info(f"Device: {self._settings.device}, Compute type: {self._settings.compute_type}")
+                logger.info(
+                    f"Workers: {num_workers}, "
+                    f"CPU threads: {self._settings.whisper_cpu_threads or 'default'}"
+                )
                 
                 self._model = WhisperModel(
                     model_size_or_path=self._settings.model_size,
                     device=self._settings.device,
                     compute_type=self._settings.compute_type,
                     local_files_only=False,  # Allow downloading if model not cached
-                    num_workers=1  # Use single worker to avoid threading issues
+                    # Workers let concurrent transcribe() calls from different threads run
+                    # in parallel; each one holds its own model replica state, so raise it
+                    # only as far as memory allows
+                    num_workers=num_workers,
+                    cpu_threads=self._settings.whisper_cpu_threads
                 )
+                self._batched_pipeline = BatchedInferencePipeline(model=self._model)
+                self._loaded.set()
                 
                 logger.info("Whisper model loaded successfully")
                 
@@ -85,6 +98,20 @@ class WhisperModelManager:
                 logger.error(error_msg, exc_info=True)
                 raise ModelLoadException(error_msg)
     
+    def warmup(self) -> None:
+        """
+        Run a dummy transcription of one second of silence.
+        
+        The first inference pays for lazy initialization (CUDA context,
+        kernel selection, tokenizer and mel filter setup); doing it here
+        keeps that cost out of the first real request.
+        
+        Raises:
+            ModelLoadException: If model is not loaded
+        """
+        segments, _ = self.model.transcribe(np.zeros(16000, dtype=np.float32), beam_size=1)
+        list(segments)  # Segments are generated lazily; consume them to run the decoder
+    
     @property
     def model(self) -> WhisperModel:
         """
@@ -96,10 +123,28 @@ class WhisperModelManager:
         Raises:
             ModelLoadException: If model is not loaded
         """
-        if self._model is None:
+        if not self._loaded.is_set():
             raise ModelLoadException("Model not loaded. Call load_model() first.")
         return self._model
     
+    @property
+    def batched_pipeline(self) -> BatchedInferencePipeline:
+        """
+        Get the batched inference pipeline wrapping the loaded model.
+        
+        The pipeline shares the model weights and decodes several audio
+        chunks per forward pass.
+        
+        Returns:
+            BatchedInferencePipeline: The batched pipeline
+            
+        Raises:
+            ModelLoadException: If model is not loaded
+        """
+        if not self._loaded.is_set():
+            raise ModelLoadException("Model not loaded. Call load_model() first.")
+        return self._batched_pipeline
+    
     @property
     def is_loaded(self) -> bool:
         """
@@ -108,7 +153,7 @@ class WhisperModelManager:
         Returns:
             bool: True if model is loaded, False otherwise
         """
-        return self._model is not None
+        return self._loaded.is_set()
     
     def get_model_info(self) -> dict:
         """
@@ -125,21 +170,19 @@ class WhisperModelManager:
         }
 
 
-# Global model manager instance
-model_manager = WhisperModelManager()
-
-
+@functools.cache
 def get_model_manager() -> WhisperModelManager:
     """
-    Get the global model manager instance.
+    Get the process-wide model manager instance.
     
+    The instance is created on first call and cached afterwards.
     This function can be used as a FastAPI dependency to inject
     the model manager into route handlers.
     
     Returns:
-        WhisperModelManager: The global model manager instance
+        WhisperModelManager: The shared model manager instance
     """
-    return model_manager
+    return WhisperModelManager()
 
 
 async def initialize_model() -> None:
@@ -153,5 +196,20 @@ async def initialize_model() -> None:
     """
     logger.info("Initializing Whisper model...")
     loop = asyncio.get_running_loop()
-    await loop.run_in_executor(None, model_manager.load_model)
+    await loop.run_in_executor(None, get_model_manager().load_model)
     logger.info("Model initialization complete")
+
+
+async def warmup_model() -> None:
+    """
+    Warm up the loaded Whisper model during application startup.
+    
+    Failures are logged but not raised, since a cold model still works.
+    """
+    logger.info("Warming up Whisper model...")
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(None, get_model_manager().warmup)
+        logger.info("Model warm-up complete")
+    except Exception as e:
+        logger.warning(f"Model warm-up failed: {str(e)}")
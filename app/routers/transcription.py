@@ -2,21 +2,29 @@
 API routes for audio transcription, supporting both synchronous and asynchronous processing.
 """
 
+import logging
 import os
-import shutil
 import uuid
-rom fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
-from rq.job import Job
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
 
-from ..core.config import get_settings
+import aiofiles
+from fastapi import (
+    APIRouter, Depends, File, Header, HTTPException, Query, Request, Response, UploadFile, status
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+from rq.job import Job, JobStatus
+from rq.results import Result
+
+from ..core.config import Settings
 from ..core.exceptions import FileValidationException
 from ..core.logging import get_logger
 from ..core.queue import get_queue, get_redis_connection
 from ..models.schemas import (
     ErrorResponse, HealthResponse, JobStatusResponse, JobSubmitResponse, TranscriptionResponse
 )
-from ..models.whisper import get_model_manager
-from ..services.transcription import TranscriptionService, get_transcription_service
 from worker import transcribe_job
 
 logger = get_logger(__name__)
@@ -25,6 +33,7 @@ logger = get_logger(__name__)
 router = APIRouter(
     prefix="/api/v1",
     tags=["transcription"],
+    default_response_class=ORJSONResponse,
     responses={
         404: {"description": "Not found"},
         500: {"model": ErrorResponse, "description": "Internal Server Error"},
@@ -32,8 +41,23 @@ router = APIRouter(
 )
 
 SHARED_AUDIO_PATH = "/app/shared_audio"
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
+MAX_JOB_IDS_PER_REQUEST = 100
+FINISHED_RESULT_CACHE_SIZE = 1024
+
+# Results of finished jobs are immutable; validate and dump them once and keep them (LRU)
+_transcription_adapter = TypeAdapter(TranscriptionResponse)
+_finished_results: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
 
-async def _save_upload_file(upload_file: UploadFile) -> str:
+
+def get_app_settings(request: Request) -> Settings:
+    """
+    Return the settings instance stored on the application state.
+    """
+    return request.app.state.settings
+
+
+async def _save_upload_file(upload_file: UploadFile, settings: Settings) -> str:
     """
     Save an uploaded file to the shared audio directory.
     """
@@ -42,25 +66,38 @@ async def _save_upload_file(upload_file: UploadFile) -> str:
 
     # Basic validation
     # You might want to expand this based on the service validation logic
-    settings = get_settings()
-    file_extension = upload_file.filename.lower().split('.')[-1]
+    file_extension = os.path.splitext(upload_file.filename)[1][1:].lower()
     if file_extension not in settings.parsed_allowed_extensions:
         raise FileValidationException(f"File extension '{file_extension}' not allowed.")
 
+    # Reject oversize uploads before writing anything to the shared directory
+    max_bytes = settings.max_file_size_bytes
+    too_large_message = f"File size exceeds maximum limit of {settings.max_file_size_mb}MB"
+    if upload_file.size is not None and upload_file.size > max_bytes:
+        raise FileValidationException(too_large_message)
+
     # Create a unique filename and save the file
-    if not os.path.exists(SHARED_AUDIO_PATH):
-        os.makedirs(SHARED_AUDIO_PATH)
-    
-    unique_filename = f"{uuid.uuid4()}.{file_extension}"
+    # (SHARED_AUDIO_PATH is created once during application startup)
+    unique_filename = f"{uuid.uuid4().hex}.{file_extension}"
     file_path = os.path.join(SHARED_AUDIO_PATH, unique_filename)
     
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(upload_file.file, buffer)
-        logger.info(f"Saved uploaded file to: {file_path}")
+        written = 0
+        await upload_file.seek(0)
+        async with aiofiles.open(file_path, "wb") as buffer:
+            while chunk := await upload_file.read(UPLOAD_CHUNK_SIZE):
+                written += len(chunk)
+                if written > max_bytes:
+                    raise FileValidationException(too_large_message)
+                await buffer.write(chunk)
+        logger.info("Saved uploaded file to: %s", file_path)
         return file_path
+    except FileValidationException:
+        os.unlink(file_path)
+        raise
     except Exception as e:
-        logger.error(f"Failed to save file: {e}", exc_info=True)
+        # Tracebacks are only formatted when debug logging is enabled
+        logger.error("Failed to save file: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
         raise HTTPException(status_code=500, detail="Failed to save uploaded file.")
 
 @router.post(
@@ -72,31 +109,151 @@ async def _save_upload_file(upload_file: UploadFile) -> str:
 )
 async def submit_transcription_job(
     audio_file: UploadFile = File(..., description="Audio file to transcribe"),
-    queue = Depends(get_queue)
+    queue = Depends(get_queue),
+    settings: Settings = Depends(get_app_settings)
 ) -> JobSubmitResponse:
-    file_path = await _save_upload_file(audio_file)
+    file_path = await _save_upload_file(audio_file, settings)
     
-    # Enqueue the job
-    job = queue.enqueue(transcribe_job, file_path, result_ttl=3600) # Keep result for 1 hour
-    logger.info(f"Enqueued job {job.id} for file: {file_path}")
+    # Enqueue the job; the Redis round trip runs in the threadpool, off the event loop
+    job = await run_in_threadpool(queue.enqueue, transcribe_job, file_path, result_ttl=3600) # Keep result for 1 hour
+    logger.info("Enqueued job %s for file: %s", job.id, file_path)
     
     return JobSubmitResponse(job_id=job.id)
 
+def _cached_result(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Return the cached result of a finished job, if any.
+    """
+    result = _finished_results.get(job_id)
+    if result is not None:
+        _finished_results.move_to_end(job_id)
+    return result
+
+def _cache_result(job_id: str, result_data: dict) -> Dict[str, Any]:
+    """
+    Validate a finished job's result once and keep it, dumped, for later polls.
+
+    A finished job's result never changes, so it is safe to serve it from
+    memory for as long as the job itself still exists in Redis.
+    """
+    result = _transcription_adapter.dump_python(_transcription_adapter.validate_python(result_data))
+    _finished_results[job_id] = result
+    if len(_finished_results) > FINISHED_RESULT_CACHE_SIZE:
+        _finished_results.popitem(last=False)
+    return result
+
+def _job_status_body(job_id: str, job_status: str, result: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Build a JobStatusResponse body from already validated parts.
+
+    The job routes return it in an ORJSONResponse directly, so FastAPI
+    skips validating and serializing it through the response model again.
+    """
+    return {"job_id": job_id, "status": job_status, "result": result}
+
+def _job_etag(job_id: str, job_status: str) -> str:
+    """
+    Build the ETag of a job status response.
+
+    The response body is fully determined by the job and its status,
+    since a finished job's result never changes. The status is rendered
+    by value, as str() of a str enum includes the class name on 3.11+.
+    """
+    return f'"{job_id}:{JobStatus(job_status).value}"'
+
 @router.get("/jobs/{job_id}", response_model=JobStatusResponse, summary="Check job status")
-async def get_job_status(job_id: str) -> JobStatusResponse:
+async def get_job_status(
+    job_id: str,
+    if_none_match: Optional[str] = Header(None),
+    connection = Depends(get_redis_connection)
+) -> Response:
     try:
-        job = Job.fetch(job_id, connection=get_redis_connection())
+        # Job.fetch loads the whole job hash, status included
+        job = await run_in_threadpool(Job.fetch, job_id, connection=connection)
     except Exception:
         raise HTTPException(status_code=404, detail="Job not found.")
 
-    status = job.get_status()
+    job_status = job.get_status(refresh=False)
+    etag = _job_etag(job_id, job_status)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match and etag in (tag.strip() for tag in if_none_match.split(",")):
+        # Unchanged since the client's last poll: skip the result fetch and body encoding
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
     result = None
-    if status == 'finished':
-        result_data = job.result
-        if result_data:
-            result = TranscriptionResponse(**result_data)
+    if job_status == JobStatus.FINISHED:
+        result = _cached_result(job_id)
+        if result is None:
+            # Only the first poll of a finished job pays the round trip for its result
+            result_data = await run_in_threadpool(job.return_value)
+            if result_data:
+                result = _cache_result(job_id, result_data)
+
+    return ORJSONResponse(_job_status_body(job_id, JobStatus(job_status).value, result), headers=headers)
+
+def _fetch_jobs_state(
+    job_ids: List[str], connection, cached_ids: Set[str]
+) -> Tuple[List[Optional[Job]], Dict[str, Any]]:
+    """
+    Fetch several jobs and the results of the finished ones not in `cached_ids`.
+
+    Job hashes are loaded with a single pipeline (Job.fetch_many), and the
+    latest results of finished jobs with a second one, so the cost is two
+    Redis round trips regardless of the number of jobs. This performs
+    blocking Redis I/O and is meant to run in the threadpool.
+    """
+    jobs = Job.fetch_many(job_ids, connection=connection)
+    finished = [
+        job for job in jobs
+        if job is not None
+        and job.id not in cached_ids
+        and job.get_status(refresh=False) == JobStatus.FINISHED
+    ]
+    results: Dict[str, Any] = {}
+    if not finished:
+        return jobs, results
+
+    with connection.pipeline() as pipeline:
+        for job in finished:
+            pipeline.xrevrange(Result.get_key(job.id), '+', '-', count=1)
+        responses = pipeline.execute()
+
+    for job, response in zip(finished, responses):
+        if not response:
+            continue
+        result_id, payload = response[0]
+        latest = Result.restore(job.id, result_id.decode(), payload, connection=connection)
+        if latest.type == Result.Type.SUCCESSFUL:
+            results[job.id] = latest.return_value
+    return jobs, results
+
+@router.get("/jobs", response_model=List[JobStatusResponse], summary="Check the status of several jobs")
+async def get_jobs_status(
+    ids: List[str] = Query(..., description="Job IDs, repeated or comma-separated"),
+    connection = Depends(get_redis_connection)
+) -> ORJSONResponse:
+    job_ids = [job_id.strip() for value in ids for job_id in value.split(",") if job_id.strip()]
+    if not job_ids:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No job IDs were given.")
+    if len(job_ids) > MAX_JOB_IDS_PER_REQUEST:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_JOB_IDS_PER_REQUEST} job IDs can be requested at once."
+        )
+
+    cached_ids = {job_id for job_id in job_ids if job_id in _finished_results}
+    jobs, results = await run_in_threadpool(_fetch_jobs_state, job_ids, connection, cached_ids)
 
-    return JobStatusResponse(job_id=job.id, status=status, result=result)
+    statuses = []
+    for job_id, job in zip(job_ids, jobs):
+        if job is None:
+            statuses.append(_job_status_body(job_id, "not_found", None))
+            continue
+        result = _cached_result(job_id)
+        if result is None and results.get(job_id):
+            result = _cache_result(job_id, results[job_id])
+        statuses.append(_job_status_body(job_id, JobStatus(job.get_status(refresh=False)).value, result))
+    return ORJSONResponse(statuses)
 
 @router.get(
     "/health",
@@ -104,10 +261,10 @@ async def get_job_status(job_id: str) -> JobStatusResponse:
     status_code=status.HTTP_200_OK,
     summary="Health check",
 )
-async def health_check(
-    model_manager = Depends(get_model_manager),
-    settings = Depends(get_settings)
-) -> HealthResponse:
+async def health_check(request: Request) -> HealthResponse:
+    # Read the shared instances off the app state; no dependency resolution on this hot path
+    settings = request.app.state.settings
+    model_manager = request.app.state.model_manager
     is_healthy = model_manager.is_loaded
     status_text = "healthy" if is_healthy else "model_not_loaded"
     
@@ -3,140 +3,336 @@ WebSocket endpoint for real-time audio transcription with transcoding.
 """
 
 import asyncio
-import ffmpeg
+import queue
+import threading
+from typing import Callable, List, Optional, Set, Tuple
+
+import av
 import numpy as np
-import webrtcvad
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
+from faster_whisper.vad import get_vad_model
 
 from app.core.logging import get_logger
-from app.services.transcription import get_transcription_service
+from app.services.transcription import get_stream_batcher
 
 router = APIRouter()
 logger = get_logger(__name__)
 
 # VAD and audio settings
-VAD_AGGRESSIVENESS = 3
 SAMPLE_RATE = 16000
 FRAME_DURATION_MS = 30
 CHUNK_SIZE = int(SAMPLE_RATE * FRAME_DURATION_MS / 1000)
+VAD_THRESHOLD = 0.5
+VAD_WINDOW_SIZE = 512  # Samples per Silero VAD window at 16kHz
+VAD_BATCH_FRAMES = 32  # 32 frames of 30ms = 30 Silero windows (~1s of audio)
+MAX_SEGMENT_SECONDS = 30  # Longest speech segment buffered before it is flushed
+HANGOVER_FRAMES = 10  # 300ms of consecutive silence ends an utterance
+MIN_SPEECH_FRAMES = 8  # Utterances with less than 240ms of speech are dropped
+INT16_SCALE = np.float32(1.0 / 32768.0)
+# Start decoding as soon as the WebM header is parsed instead of probing seconds of audio
+DEMUXER_OPTIONS = {"fflags": "nobuffer", "probesize": "32", "analyzeduration": "0"}
+MAX_PENDING_CHUNKS = 256  # Client messages waiting for the decoder before the connection is dropped
+
+
+def int16_to_float32(samples: np.ndarray, out: np.ndarray) -> np.ndarray:
+    """
+    Scale int16 PCM samples to float32 in [-1, 1) in a single pass into `out`.
+    """
+    return np.multiply(samples, INT16_SCALE, out=out[:samples.size], dtype=np.float32)
+
+
+class SileroVadBatcher:
+    """
+    Batches PCM frames and classifies them with the Silero VAD model.
+
+    Frames are accumulated until a full batch is available, which is then
+    scored with a single ONNX Runtime call instead of one call per frame;
+    `flush` scores a partial batch early. The model is the one bundled with
+    faster-whisper and is shared by all connections. Scoring blocks, so
+    it is meant to run on the connection's decoder thread.
+    """
+
+    def __init__(self, threshold: float = VAD_THRESHOLD):
+        self.threshold = threshold
+        self.model = get_vad_model()
+        self._frames: List[bytes] = []
+        self._batch = np.empty(VAD_BATCH_FRAMES * CHUNK_SIZE, dtype=np.float32)
+
+    def push(self, frame: bytes) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Add a frame and return (frames, is_speech) arrays once a batch is full.
+
+        `frames` holds the batch's int16 samples with one row per frame, and
+        `is_speech` the matching per-frame speech decisions.
+        """
+        self._frames.append(frame)
+        if len(self._frames) < VAD_BATCH_FRAMES:
+            return None
+        return self.flush()
+
+    def flush(self) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Score the frames collected so far, even if the batch isn't full.
+
+        Returns None when there are no frames to score.
+        """
+        if not self._frames:
+            return None
+
+        count = len(self._frames)
+        pcm = np.frombuffer(b"".join(self._frames), dtype=np.int16)
+        self._frames = []
+        # Pad a partial batch with silence up to a whole number of VAD windows
+        padded = -(-pcm.size // VAD_WINDOW_SIZE) * VAD_WINDOW_SIZE
+        audio = self._batch[:padded]
+        int16_to_float32(pcm, audio)
+        audio[pcm.size:] = 0
+        window_probs = self.model(audio[np.newaxis, :], num_samples=VAD_WINDOW_SIZE)[0]
+        # Spread window probabilities over samples, then take the peak per frame
+        sample_probs = np.repeat(window_probs, VAD_WINDOW_SIZE)[:pcm.size]
+        frame_probs = sample_probs.reshape(count, CHUNK_SIZE).max(axis=1)
+        return pcm.reshape(count, CHUNK_SIZE), frame_probs > self.threshold
+
+class _ChunkStream:
+    """
+    Blocking, read-only file object over chunks fed from the event loop.
+
+    PyAV reads the WebM container from it on the decoder thread; `read`
+    blocks until the client sends more data, and returns b"" once closed.
+    `on_idle` is called on the reading thread right before it blocks.
+    At most `max_chunks` chunks are held for the decoder at a time.
+    """
+
+    def __init__(self, max_chunks: int = MAX_PENDING_CHUNKS, on_idle: Optional[Callable[[], None]] = None):
+        self._chunks: "queue.SimpleQueue[bytes]" = queue.SimpleQueue()
+        self._max_chunks = max_chunks
+        self._on_idle = on_idle
+        self._pending = b""
+        self._closed = False
+
+    def feed(self, data: bytes) -> bool:
+        """Queue a chunk for the decoder; returns False if too many are already waiting."""
+        if self._chunks.qsize() >= self._max_chunks:
+            return False
+        self._chunks.put(data)
+        return True
+
+    def close(self):
+        self._chunks.put(b"")  # End-of-stream sentinel
+
+    def read(self, size: int = -1) -> bytes:
+        if not self._pending and not self._closed:
+            if self._on_idle is not None and self._chunks.empty():
+                self._on_idle()
+            self._pending = self._chunks.get()
+            self._closed = not self._pending
+        if size < 0:
+            size = len(self._pending)
+        data, self._pending = self._pending[:size], self._pending[size:]
+        return data
+
 
 class AudioTranscoder:
     """
-    Handles the real-time transcoding of an audio stream using FFmpeg
-    and processes the resulting PCM data for voice activity detection.
+    Decodes a WebM/Opus audio stream in-process with PyAV and processes
+    the resulting PCM data for voice activity detection.
+
+    Decoding and VAD scoring run on a per-connection thread; the event
+    loop only receives audio, segments utterances and sends results.
     """
 
     def __init__(self, websocket: WebSocket):
         self.websocket = websocket
-        self.vad = webrtcvad.Vad(VAD_AGGRESSIVENESS)
-        self.transcription_service = get_transcription_service()
-        self.audio_buffer = bytearray()
-        self.is_speaking = False
-        self.ffmpeg_process = None
-
-    def _start_ffmpeg_process(self):
-        """Starts the FFmpeg subprocess for transcoding."""
-        logger.info("Starting FFmpeg process for audio transcoding.")
+        self.vad = SileroVadBatcher()
+        self.stream_batcher = get_stream_batcher()
+        # Preallocated speech buffer with a write pointer; never reallocated
+        self._buf = np.empty(SAMPLE_RATE * MAX_SEGMENT_SECONDS, dtype=np.int16)
+        self._wp = 0
+        # Speech decision of every frame in the buffer, for endpointing
+        self._is_speech = np.zeros(self._buf.size // CHUNK_SIZE, dtype=np.bool_)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pcm_pending = b""  # Decoded PCM not yet making up a whole frame
+        # Score what has been decoded whenever the decoder waits for the client
+        self._stream = _ChunkStream(on_idle=self._flush_vad)
+        self._decisions: "asyncio.Queue[Optional[Tuple[np.ndarray, np.ndarray]]]" = asyncio.Queue()
+        # One transcription at a time per connection keeps results in order
+        self._transcribe_lock = asyncio.Semaphore(1)
+        self._transcribe_tasks: Set[asyncio.Task] = set()
+        self._decode_error: Optional[Exception] = None
+
+    def _decode_stream(self):
+        """
+        Demuxes and decodes the client stream to 16kHz mono int16 PCM and
+        classifies it with the VAD.
+
+        Runs on a dedicated thread, since PyAV blocks while waiting for
+        more of the stream and VAD scoring is CPU-bound; the VAD decisions
+        are handed back to the event loop.
+        """
         try:
-            self.ffmpeg_process = (
-                ffmpeg.input('pipe:', format='webm', acodec='opus')
-                .output('pipe:', format='s16le', acodec='pcm_s16le', ar=SAMPLE_RATE, ac=1)
-                .run_async(pipe_stdin=True, pipe_stdout=True, pipe_stderr=True)
-            )
-            logger.info("FFmpeg process started successfully.")
+            with av.open(self._stream, mode="r", format="webm", options=DEMUXER_OPTIONS) as container:
+                resampler = av.AudioResampler(format="s16", layout="mono", rate=SAMPLE_RATE)
+                for frame in container.decode(audio=0):
+                    for resampled in resampler.resample(frame):
+                        self._push_pcm(resampled.to_ndarray().tobytes())
+                # Flush the samples the resampler still holds at the end of the stream
+                for resampled in resampler.resample(None):
+                    self._push_pcm(resampled.to_ndarray().tobytes())
+            self._flush_vad()
         except Exception as e:
-            logger.critical(f"Failed to start FFmpeg process: {e}", exc_info=True)
-            raise RuntimeError("Failed to start FFmpeg for audio transcoding.")
+            logger.error(f"Audio decoding failed: {e}", exc_info=True)
+            self._decode_error = e
+        finally:
+            self._loop.call_soon_threadsafe(self._decisions.put_nowait, None)
 
-    async def _read_from_ffmpeg(self):
+    def _push_pcm(self, pcm: bytes):
         """
-        Reads transcoded PCM audio from FFmpeg's stdout and processes it.
+        Splits decoded PCM into VAD frames and scores them in batches.
         """
-        while self.ffmpeg_process and self.ffmpeg_process.stdout:
-            try:
-                chunk = await self.ffmpeg_process.stdout.read(CHUNK_SIZE * 2) # 2 bytes per sample
-                if not chunk:
-                    break # FFmpeg process has closed stdout
-                await self._process_vad(chunk)
-            except Exception as e:
-                logger.error(f"Error reading from FFmpeg: {e}", exc_info=True)
-                break
+        pending = self._pcm_pending + pcm
+        frame_bytes = CHUNK_SIZE * 2  # 2 bytes per sample
+        usable = len(pending) - len(pending) % frame_bytes
+        for offset in range(0, usable, frame_bytes):
+            decisions = self.vad.push(pending[offset:offset + frame_bytes])
+            if decisions is not None:
+                self._loop.call_soon_threadsafe(self._decisions.put_nowait, decisions)
+        self._pcm_pending = pending[usable:]
 
-    async def _process_vad(self, chunk: bytes):
+    def _flush_vad(self):
         """
-        Processes a chunk of PCM audio with VAD.
+        Scores the partial VAD batch, so no decision waits on more audio.
         """
-        if len(chunk) != CHUNK_SIZE * 2:
-            return # Incomplete frame
+        decisions = self.vad.flush()
+        if decisions is not None:
+            self._loop.call_soon_threadsafe(self._decisions.put_nowait, decisions)
 
+    async def _read_decisions(self):
+        """
+        Processes VAD decisions as the decoder thread produces them.
+        """
+        while (decisions := await self._decisions.get()) is not None:
+            await self._process_vad(*decisions)
+
+    async def _process_vad(self, frames: np.ndarray, is_speech: np.ndarray):
+        """
+        Segments utterances from a batch of frames and their VAD decisions.
+        """
         try:
-            is_speech = self.vad.is_speech(chunk, SAMPLE_RATE)
-            if is_speech:
-                self.is_speaking = True
-                self.audio_buffer.extend(chunk)
-            elif self.is_speaking:
-                self.is_speaking = False
-                await self._transcribe_buffer()
+            for frame, speech in zip(frames, is_speech):
+                if not speech and not self._wp:
+                    continue  # Silence outside of an utterance
+                if self._wp + CHUNK_SIZE > self._buf.size:
+                    await self._transcribe_buffer()  # Segment reached MAX_SEGMENT_SECONDS
+                n = self._wp // CHUNK_SIZE
+                self._buf[self._wp:self._wp + CHUNK_SIZE] = frame
+                self._is_speech[n] = speech
+                self._wp += CHUNK_SIZE
+                n += 1
+                # End the utterance after a run of silence, so short pauses don't split it
+                if not speech and n >= HANGOVER_FRAMES and not self._is_speech[n - HANGOVER_FRAMES:n].any():
+                    if np.count_nonzero(self._is_speech[:n]) >= MIN_SPEECH_FRAMES:
+                        await self._transcribe_buffer()
+                    else:
+                        self._wp = 0  # Too little speech to be worth a Whisper call
         except Exception as e:
             logger.error(f"VAD processing failed: {e}")
 
     async def _transcribe_buffer(self):
         """
-        Transcribes the audio stored in the buffer.
+        Hands the audio stored in the buffer off to a background transcription.
+
+        The transcription runs in its own task so the PCM reader keeps
+        draining audio (and the websocket keeps answering pings) meanwhile.
         """
-        if not self.audio_buffer:
+        if not self._wp:
             return
 
-        logger.info(f"Transcribing audio buffer of {len(self.audio_buffer)} bytes.")
-        audio_array = np.frombuffer(self.audio_buffer, dtype=np.int16).astype(np.float32) / 32768.0
-        self.audio_buffer.clear()
+        # Convert straight out of the speech buffer; the task owns the float32 copy
+        audio_array = int16_to_float32(self._buf[:self._wp], np.empty(self._wp, dtype=np.float32))
+        self._wp = 0
+        task = asyncio.create_task(self._transcribe_segment(audio_array))
+        self._transcribe_tasks.add(task)
+        task.add_done_callback(self._transcribe_tasks.discard)
 
-        try:
-            response = await self.transcription_service.transcribe_stream(audio_array)
-            if response and response.text.strip():
-                logger.info(f"Sending transcription: {response.text}")
-                await self.websocket.send_json(response.model_dump())
-        except Exception as e:
-            logger.error(f"Transcription failed: {e}", exc_info=True)
-            await self.websocket.send_json({"error": "Transcription failed."})
+    async def _transcribe_segment(self, audio_array: np.ndarray):
+        """
+        Transcribes one speech segment and sends the result to the client.
+        """
+        async with self._transcribe_lock:
+            logger.info(f"Transcribing audio segment of {audio_array.size} samples.")
+            try:
+                response = await self.stream_batcher.submit(audio_array)
+                if response and response.text.strip():
+                    logger.info(f"Sending transcription: {response.text}")
+                    await self.websocket.send_json(response.model_dump())
+            except Exception as e:
+                logger.error(f"Transcription failed: {e}", exc_info=True)
+                try:
+                    await self.websocket.send_json({"error": "Transcription failed."})
+                except Exception:
+                    logger.debug("Could not report the transcription failure to the client.")
 
     async def run(self):
         """
         Main loop to run the transcoder.
         """
-        self._start_ffmpeg_process()
-        
+        self._loop = asyncio.get_running_loop()
+        decoder = threading.Thread(target=self._decode_stream, daemon=True)
+        decoder.start()
+
         # Create two concurrent tasks
-        ffmpeg_reader_task = asyncio.create_task(self._read_from_ffmpeg())
-        websocket_writer_task = asyncio.create_task(self._write_to_ffmpeg())
+        decision_reader_task = asyncio.create_task(self._read_decisions())
+        websocket_reader_task = asyncio.create_task(self._receive_audio())
 
-        await asyncio.gather(ffmpeg_reader_task, websocket_writer_task)
+        # The decision reader ends with the decoder, normally after the client disconnects
+        await decision_reader_task
+        if self._decode_error is not None and not websocket_reader_task.done():
+            websocket_reader_task.cancel()
+            await self._close_with_error(
+                "Could not decode the audio stream. Send WebM/Opus audio.",
+                status.WS_1003_UNSUPPORTED_DATA
+            )
+        try:
+            await websocket_reader_task
+        except asyncio.CancelledError:
+            pass
 
-    async def _write_to_ffmpeg(self):
+    async def _receive_audio(self):
         """
-        Receives audio from the client and writes it to FFmpeg's stdin.
+        Receives audio from the client and feeds it to the decoder.
         """
         try:
             while True:
-                data = await self.websocket.receive_bytes()
-                if self.ffmpeg_process and self.ffmpeg_process.stdin:
-                    self.ffmpeg_process.stdin.write(data)
-                    await self.ffmpeg_process.stdin.drain()
+                if not self._stream.feed(await self.websocket.receive_bytes()):
+                    logger.warning("Audio decoder fell behind the stream; closing the connection.")
+                    await self._close_with_error(
+                        "Audio is arriving faster than it can be decoded.",
+                        status.WS_1013_TRY_AGAIN_LATER
+                    )
+                    return
         except WebSocketDisconnect:
             logger.info("Client disconnected.")
         finally:
             await self._cleanup()
 
+    async def _close_with_error(self, message: str, code: int):
+        """
+        Sends an error message to the client and closes the connection.
+        """
+        try:
+            await self.websocket.send_json({"error": message})
+            await self.websocket.close(code=code)
+        except Exception:
+            logger.debug("Could not report the error to the client.")
+
     async def _cleanup(self):
         """
-        Cleans up resources, especially the FFmpeg process.
+        Cleans up resources, ending the decoder and pending transcriptions.
         """
         logger.info("Cleaning up resources.")
-        if self.ffmpeg_process and self.ffmpeg_process.stdin:
-            self.ffmpeg_process.stdin.close()
-        if self.ffmpeg_process:
-            await self.ffmpeg_process.wait()
-            logger.info("FFmpeg process terminated.")
+        for task in list(self._transcribe_tasks):
+            task.cancel()
+        self._stream.close()
 
 @router.websocket("/ws/transcribe")
 async def websocket_transcribe(websocket: WebSocket):
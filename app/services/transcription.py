@@ -7,23 +7,48 @@ the Whisper model for speech-to-text conversion.
 """
 
 import asyncio
+import bisect
 import os
-import tempfile
 import time
 from concurrent.futures import ThreadPoolExecutor
-from typing import BinaryIO, Tuple
+from functools import lru_cache
+from typing import Optional, Tuple, Union
 
 from fastapi import UploadFile
+from faster_whisper.audio import decode_audio
+from faster_whisper.vad import VadOptions, get_speech_timestamps, merge_segments
 
 from ..core.config import get_settings
 from ..core.exceptions import FileValidationException, TranscriptionException
 from ..core.logging import get_logger
 import numpy as np
 from ..models.schemas import TranscriptionResponse, RealtimeTranscriptionResponse
-from ..models.whisper import get_model_manager
+from ..models.whisper import WhisperModelManager, get_model_manager
 
 logger = get_logger(__name__)
 
+SAMPLE_RATE = 16000  # faster-whisper decodes and transcribes 16kHz mono audio
+BATCHED_MIN_DURATION_S = 2  # Shorter files are transcribed without the batched pipeline
+SAMPLES_PER_MS = SAMPLE_RATE // 1000  # faster-whisper rounds segment times to milliseconds
+
+
+def extract_text_from_segments(segments) -> str:
+    """
+    Extract and concatenate text from transcription segments.
+    
+    Shared by the API service and the RQ worker so both produce the same text.
+    
+    Args:
+        segments: Transcription segments from Whisper
+        
+    Returns:
+        str: Concatenated transcription text
+    """
+    # Strip each text once; str.join materializes a list anyway, so build it directly
+    return " ".join([
+        text for segment in segments if (text := getattr(segment, "text", "").strip())
+    ])
+
 
 class TranscriptionService:
     """
@@ -34,14 +59,29 @@ class TranscriptionService:
     using the faster-whisper model.
     """
     
-    def __init__(self, use_thread_pool: bool = True):
-        """Initialize the transcription service."""
+    def __init__(self, use_thread_pool: bool = True, model_manager: Optional[WhisperModelManager] = None):
+        """
+        Initialize the transcription service.
+        
+        Args:
+            use_thread_pool: Whether to create executors for the async methods
+            model_manager: Model manager to transcribe with; defaults to the
+                          process-wide instance
+        """
         self._settings = get_settings()
-        self._model_manager = get_model_manager()
+        self._model_manager = model_manager or get_model_manager()
         if use_thread_pool:
+            # CPU-side work such as decoding uploads
             self._executor = ThreadPoolExecutor(max_workers=self._settings.max_workers)
+            # Model calls, one thread per faster-whisper worker so they never
+            # contend for the same model replica or CUDA stream
+            self._inference_executor = ThreadPoolExecutor(
+                max_workers=self._settings.whisper_num_workers,
+                thread_name_prefix="whisper-inference"
+            )
         else:
             self._executor = None
+            self._inference_executor = None
     
     async def transcribe_audio(self, audio_file: UploadFile) -> TranscriptionResponse:
         """
@@ -49,7 +89,7 @@ class TranscriptionService:
         
         This method handles the complete transcription workflow:
         1. Validates the uploaded file
-        2. Saves it temporarily to disk
+        2. Decodes it in memory
         3. Performs transcription using the Whisper model
         4. Returns structured transcription results
         
@@ -63,30 +103,30 @@ class TranscriptionService:
             FileValidationException: If file validation fails
             TranscriptionException: If transcription fails
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         # Validate the uploaded file
         self._validate_file(audio_file)
         
-        # Create temporary file for processing
-        temp_path = None
         try:
-            # Save uploaded file to temporary location
-            temp_path = await self._save_temp_file(audio_file)
-            
-            # Perform transcription in thread pool to avoid blocking
             logger.info(f"Starting transcription for file: {audio_file.filename}")
             
+            # Decode and transcribe in thread pool to avoid blocking
             loop = asyncio.get_running_loop()
-            segments, info = await loop.run_in_executor(
+            audio = await loop.run_in_executor(
                 self._executor,
+                self._decode_upload,
+                audio_file
+            )
+            segments, info = await loop.run_in_executor(
+                self._inference_executor,
                 self._transcribe_file,
-                temp_path
+                audio
             )
             
             # Process transcription results
-            text = self._extract_text_from_segments(segments)
-            processing_time = time.time() - start_time
+            text = extract_text_from_segments(segments)
+            processing_time = time.perf_counter() - start_time
             
             logger.info(f"Transcription completed in {processing_time:.2f}s")
             
@@ -103,15 +143,6 @@ class TranscriptionService:
             
             logger.error(f"Unexpected error during transcription: {str(e)}", exc_info=True)
             raise TranscriptionException(f"Transcription failed: {str(e)}")
-            
-        finally:
-            # Clean up temporary file
-            if temp_path and os.path.exists(temp_path):
-                try:
-                    os.unlink(temp_path)
-                    logger.debug(f"Cleaned up temporary file: {temp_path}")
-                except OSError as e:
-                    logger.warning(f"Failed to clean up temporary file {temp_path}: {e}")
     
     def _validate_file(self, audio_file: UploadFile) -> None:
         """
@@ -130,9 +161,9 @@ class TranscriptionService:
             raise FileValidationException("No file was uploaded")
         
         # Check file extension
-        file_extension = audio_file.filename.lower().split('.')[-1]
+        file_extension = os.path.splitext(audio_file.filename)[1][1:].lower()
         if file_extension not in self._settings.parsed_allowed_extensions:
-            allowed = ", ".join(self._settings.parsed_allowed_extensions)
+            allowed = ", ".join(sorted(self._settings.parsed_allowed_extensions))
             raise FileValidationException(
                 f"File extension '{file_extension}' not allowed. "
                 f"Supported formats: {allowed}"
@@ -154,41 +185,30 @@ class TranscriptionService:
             if audio_file.content_type != 'application/octet-stream':
                 logger.warning(f"Unexpected content type: {audio_file.content_type}")
     
-    async def _save_temp_file(self, audio_file: UploadFile) -> str:
+    def _decode_upload(self, audio_file: UploadFile) -> np.ndarray:
         """
-        Save uploaded file to a temporary location.
+        Decode an uploaded file to 16kHz mono float32 audio in memory.
+        
+        The upload is read from the file object FastAPI already spooled it
+        to, so the audio is never copied to another file on disk.
         
         Args:
-            audio_file: The uploaded file to save
+            audio_file: The uploaded file to decode
             
         Returns:
-            str: Path to the temporary file
+            np.ndarray: The decoded audio samples
             
         Raises:
-            TranscriptionException: If file saving fails
+            TranscriptionException: If the file cannot be decoded
         """
         try:
-            # Create temporary file with appropriate extension
-            filename = audio_file.filename or "unknown.wav"
-            file_extension = filename.lower().split('.')[-1]
-            suffix = f".{file_extension}"
-            
-            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
-                temp_path = temp_file.name
-                
-                # Read and write file content in chunks to handle large files
-                await audio_file.seek(0)  # Reset file pointer
-                while chunk := await audio_file.read(8192):  # 8KB chunks
-                    temp_file.write(chunk)
-            
-            logger.debug(f"Saved temporary file: {temp_path}")
-            return temp_path
-            
+            audio_file.file.seek(0)  # Reset file pointer
+            return decode_audio(audio_file.file, sampling_rate=SAMPLE_RATE)
         except Exception as e:
-            logger.error(f"Failed to save temporary file: {str(e)}", exc_info=True)
+            logger.error(f"Failed to decode uploaded file: {str(e)}", exc_info=True)
             raise TranscriptionException(f"Failed to process uploaded file: {str(e)}")
     
-    def _transcribe_file(self, file_path: str) -> Tuple:
+    def _transcribe_file(self, audio: Union[str, np.ndarray]) -> Tuple:
         """
         Transcribe an audio file using the Whisper model.
         
@@ -196,7 +216,7 @@ class TranscriptionService:
         asyncio event loop during the CPU/GPU-intensive transcription.
         
         Args:
-            file_path: Path to the audio file to transcribe
+            audio: Path to the audio file, or decoded 16kHz mono audio
             
         Returns:
             Tuple: (segments, info) from the Whisper model
@@ -205,17 +225,25 @@ class TranscriptionService:
             TranscriptionException: If transcription fails
         """
         try:
-            model = self._model_manager.model
+            if isinstance(audio, str):
+                audio = decode_audio(audio, sampling_rate=SAMPLE_RATE)
             
-            # Perform transcription with configured settings
-            segments, info = model.transcribe(
-                audio=file_path,
+            options = dict(
+                audio=audio,
                 beam_size=self._settings.beam_size,
                 language=None,  # Auto-detect language
                 word_timestamps=False,  # Disable for better performance
                 vad_filter=True,  # Enable voice activity detection
                 vad_parameters=dict(min_silence_duration_ms=500)
             )
+            # Short clips fit in a single window, so batching would gain nothing
+            if audio.shape[0] < BATCHED_MIN_DURATION_S * SAMPLE_RATE:
+                segments, info = self._model_manager.model.transcribe(**options)
+            else:
+                # Decode up to `whisper_batch_size` speech chunks per forward pass
+                segments, info = self._model_manager.batched_pipeline.transcribe(
+                    batch_size=self._settings.whisper_batch_size, **options
+                )
             
             # Convert generator to list to complete transcription
             segments_list = list(segments)
@@ -223,86 +251,36 @@ class TranscriptionService:
             return segments_list, info
             
         except Exception as e:
-            logger.error(f"Transcription failed for file {file_path}: {str(e)}", exc_info=True)
+            logger.error(f"Transcription failed: {str(e)}", exc_info=True)
             raise TranscriptionException(f"Speech recognition failed: {str(e)}")
     
-    def _extract_text_from_segments(self, segments) -> str:
-        """
-        Extract and concatenate text from transcription segments.
-        
-        Args:
-            segments: List of transcription segments from Whisper
-            
-        Returns:
-            str: Concatenated transcription text
-        """
-        if not segments:
-            return ""
-        
-        text_parts = []
-        for segment in segments:
-            if hasattr(segment, 'text') and segment.text.strip():
-                text_parts.append(segment.text.strip())
-        
-        return " ".join(text_parts)
-
-    def transcribe_file_from_path(self, file_path: str) -> dict:
-        """
-        Synchronously transcribe an audio file from a given path.
-
-        Args:
-            file_path: The absolute path to the audio file.
-
-        Returns:
-            A dictionary containing the transcription result.
-        """
-        start_time = time.time()
-        logger.info(f"Starting synchronous transcription for file: {file_path}")
-
-        try:
-            segments, info = self._transcribe_file(file_path)
-            text = self._extract_text_from_segments(segments)
-            processing_time = time.time() - start_time
-
-            logger.info(f"File transcription completed in {processing_time:.2f}s")
-
-            return {
-                "text": text,
-                "language": info.language,
-                "language_probability": info.language_probability,
-                "processing_time_seconds": round(processing_time, 3)
-            }
-        except Exception as e:
-            logger.error(f"Unexpected error during file transcription: {str(e)}", exc_info=True)
-            # Re-raise the exception to let RQ mark the job as failed
-            raise
-
-    def transcribe_batch(self, file_paths: list[str]) -> list[dict]:
+    def transcribe_batch(self, audios: list[Union[str, np.ndarray]]) -> list[dict]:
         """
-        Synchronously transcribe a batch of audio files.
+        Synchronously transcribe a batch of audio inputs in one batched pass.
 
         Args:
-            file_paths: A list of absolute paths to the audio files.
+            audios: Absolute paths to audio files, or 16kHz mono float32 arrays.
 
         Returns:
-            A list of dictionaries, each containing the transcription result for a file.
+            A list of dictionaries, each containing the transcription result for an input.
         """
-        start_time = time.time()
-        logger.info(f"Starting batch transcription for {len(file_paths)} files.")
+        start_time = time.perf_counter()
+        logger.info(f"Starting batch transcription for {len(audios)} inputs.")
 
         try:
             results = []
-            segments_batch, infos_batch = self._transcribe_batch(file_paths)
+            segments_batch, languages = self._transcribe_batch(audios)
+            processing_time = time.perf_counter() - start_time
 
-            for segments, info in zip(segments_batch, infos_batch):
-                text = self._extract_text_from_segments(segments)
+            for segments, (language, probability) in zip(segments_batch, languages):
+                text = extract_text_from_segments(segments)
                 results.append({
                     "text": text,
-                    "language": info.language,
-                    "language_probability": info.language_probability,
+                    "language": language,
+                    "language_probability": probability,
+                    "processing_time_seconds": round(processing_time, 3)
                 })
 
-            processing_time = time.time() - start_time
             logger.info(f"Batch transcription completed in {processing_time:.2f}s")
             return results
 
@@ -310,101 +288,228 @@ class TranscriptionService:
             logger.error(f"Unexpected error during batch transcription: {str(e)}", exc_info=True)
             raise
 
-    def _transcribe_batch(self, file_paths: list[str]) -> tuple[list, list]:
+    def _transcribe_batch(self, audios: list[Union[str, np.ndarray]]) -> tuple[list, list]:
         """
-        Transcribe a batch of audio files using the Whisper model.
+        Transcribe a batch of audio inputs using the batched Whisper pipeline.
+
+        Every input is split into speech clips of at most 30 seconds with the
+        VAD, and its language is detected from its own speech. Inputs that
+        share a language have their clips laid out back to back in a single
+        array, and the batched pipeline decodes up to `whisper_batch_size`
+        clips per forward pass, whichever input they come from. Segments are
+        mapped back to their input by start time. Inputs are padded and clip starts
+        are snapped to whole milliseconds, so a segment's rounded start time
+        never falls before the start of its own clip.
+
+        Returns:
+            Tuple: (segments per input, (language, probability) per input;
+            inputs without speech get no segments and an empty language)
         """
         try:
-            model = self._model_manager.model
-            
-            # faster-whisper can take a list of file paths directly
-            segments_generator, infos_generator = model.transcribe(
-                audio=file_paths,
-                beam_size=self._settings.beam_size,
-                language=None,
-                word_timestamps=False,
-                vad_filter=True,
-                vad_parameters=dict(min_silence_duration_ms=500)
+            pipeline = self._model_manager.batched_pipeline
+            vad_options = VadOptions(
+                min_silence_duration_ms=500,
+                max_speech_duration_s=pipeline.model.feature_extractor.chunk_length
             )
-            
-            return list(segments_generator), list(infos_generator)
+
+            arrays = [decode_audio(audio) if isinstance(audio, str) else audio for audio in audios]
+            clips_batch = [merge_segments(get_speech_timestamps(array, vad_options), vad_options) for array in arrays]
+
+            languages = [("", 0.0)] * len(arrays)
+            groups = {}
+            for index, (array, clips) in enumerate(zip(arrays, clips_batch)):
+                if clips:
+                    languages[index] = self._detect_language(array, clips)
+                    groups.setdefault(languages[index][0], []).append(index)
+
+            segments_batch = [[] for _ in arrays]
+            for language, indices in groups.items():
+                pieces, clip_timestamps, clip_owners = [], [], []
+                offset = 0
+                for index in indices:
+                    array = arrays[index]
+                    for clip in clips_batch[index]:
+                        start = clip["start"] - clip["start"] % SAMPLES_PER_MS
+                        clip_timestamps.append({"start": start + offset, "end": clip["end"] + offset})
+                        clip_owners.append(index)
+                    # Pad with silence so the next input starts on a whole millisecond
+                    padding = -array.shape[0] % SAMPLES_PER_MS
+                    pieces.append(array)
+                    if padding:
+                        pieces.append(np.zeros(padding, dtype=array.dtype))
+                    offset += array.shape[0] + padding
+
+                segments, _ = pipeline.transcribe(
+                    audio=np.concatenate(pieces),
+                    clip_timestamps=clip_timestamps,
+                    batch_size=self._settings.whisper_batch_size,
+                    beam_size=self._settings.beam_size,
+                    language=language,
+                    word_timestamps=False
+                )
+
+                clip_starts = [clip["start"] / SAMPLE_RATE for clip in clip_timestamps]
+                for segment in segments:
+                    clip_index = max(bisect.bisect_right(clip_starts, segment.start) - 1, 0)
+                    segments_batch[clip_owners[clip_index]].append(segment)
+
+            return segments_batch, languages
             
         except Exception as e:
             logger.error(f"Batch transcription failed: {str(e)}", exc_info=True)
             raise TranscriptionException(f"Speech recognition failed during batch processing: {str(e)}")
 
-    async def transcribe_stream(self, audio_data: np.ndarray) -> RealtimeTranscriptionResponse:
+    def _detect_language(self, audio: np.ndarray, clips: list[dict]) -> Tuple[str, float]:
         """
-        Transcribe an audio stream from a NumPy array.
+        Detect the language of one input from its speech clips.
 
         Args:
-            audio_data: NumPy array containing the audio data.
+            audio: 16kHz mono float32 audio
+            clips: Speech clips found in the audio by the VAD
 
         Returns:
-            RealtimeTranscriptionResponse: The transcription result.
+            Tuple: (language code, probability)
         """
-        start_time = time.time()
-        try:
-            loop = asyncio.get_running_loop()
-            segments, info = await loop.run_in_executor(
-                self._executor,
-                self._transcribe_stream,
-                audio_data
-            )
+        model = self._model_manager.batched_pipeline.model
+        if not model.model.is_multilingual:
+            return "en", 1.0
+        speech = np.concatenate([audio[clip["start"]:clip["end"]] for clip in clips])
+        language, probability, _ = model.detect_language(audio=speech)
+        return language, probability
+
+    async def transcribe_stream_batch(self, audios: list[np.ndarray]) -> list[dict]:
+        """
+        Transcribe several audio streams in one batched pass off the event loop.
 
-            text = self._extract_text_from_segments(segments)
-            processing_time = time.time() - start_time
+        Args:
+            audios: NumPy arrays containing 16kHz mono float32 audio.
 
-            logger.info(f"Stream transcription completed in {processing_time:.2f}s")
+        Returns:
+            A list of dictionaries, each containing the transcription result for an input.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._inference_executor, self.transcribe_batch, audios)
 
-            return RealtimeTranscriptionResponse(
-                text=text,
-                language=info.language,
-                language_probability=info.language_probability,
-                processing_time_seconds=round(processing_time, 3)
-            )
-        except Exception as e:
-            logger.error(f"Unexpected error during stream transcription: {str(e)}", exc_info=True)
-            raise TranscriptionException(f"Stream transcription failed: {str(e)}")
 
-    def _transcribe_stream(self, audio_data: np.ndarray) -> Tuple:
+class StreamTranscriptionBatcher:
+    """
+    Coalesces real-time transcription requests across websocket connections.
+
+    Requests are queued and a single consumer task drains up to
+    `max_batch_size` of them, waiting at most `max_wait_ms` for the batch
+    to fill, then transcribes them together with one batched model call.
+    Each caller awaits its own future for its result.
+    """
+
+    def __init__(self, service: TranscriptionService, max_batch_size: int, max_wait_ms: int):
+        self._service = service
+        self._max_batch_size = max_batch_size
+        self._max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._consumer: Optional[asyncio.Task] = None
+
+    async def submit(self, audio_data: np.ndarray) -> RealtimeTranscriptionResponse:
         """
-        Transcribe audio data from a NumPy array using the Whisper model.
+        Queue audio for the next batch and wait for its transcription.
 
         Args:
-            audio_data: NumPy array of the audio.
+            audio_data: NumPy array of 16kHz mono float32 audio.
 
         Returns:
-            Tuple: (segments, info) from the Whisper model.
+            RealtimeTranscriptionResponse: The transcription result.
         """
-        try:
-            model = self._model_manager.model
-            segments, info = model.transcribe(
-                audio=audio_data,
-                beam_size=self._settings.beam_size,
-                language=None,
-                word_timestamps=False,
-                vad_filter=True,
-                vad_parameters=dict(min_silence_duration_ms=500)
-            )
-            return list(segments), info
-        except Exception as e:
-            logger.error(f"Stream transcription failed: {str(e)}", exc_info=True)
-            raise TranscriptionException(f"Speech recognition failed: {str(e)}")
-
-
-# Global service instance
-transcription_service = TranscriptionService()
+        if self._consumer is None or self._consumer.done():
+            self._queue = asyncio.Queue()
+            self._consumer = asyncio.create_task(self._consume())
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((audio_data, future, time.perf_counter()))
+        return await future
+
+    async def _consume(self) -> None:
+        """Collect queued requests into batches and resolve their futures."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self._max_wait
+            while len(batch) < self._max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
 
+            await self._process(batch)
 
+    async def _process(self, batch: list) -> None:
+        """Transcribe a batch, retrying its inputs one at a time if it fails."""
+        error = TranscriptionException("Stream transcription failed")
+        try:
+            await self._transcribe(batch)
+        except Exception as e:
+            if len(batch) > 1:
+                # Don't let one bad input fail every stream it was batched with
+                logger.warning(
+                    f"Batched stream transcription of {len(batch)} inputs failed, "
+                    f"retrying them one at a time: {str(e)}"
+                )
+                for item in batch:
+                    if not item[1].done():
+                        await self._process([item])
+            else:
+                logger.error(f"Stream transcription failed: {str(e)}", exc_info=True)
+                error = TranscriptionException(f"Stream transcription failed: {str(e)}")
+        finally:
+            # Never leave a caller waiting, whatever went wrong with its batch
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(error)
+
+    async def _transcribe(self, batch: list) -> None:
+        """Transcribe one batch of queued requests and resolve their futures."""
+        results = await self._service.transcribe_stream_batch([item[0] for item in batch])
+        finished_at = time.perf_counter()
+        logger.info(f"Stream batch of {len(batch)} transcribed")
+        for (_, future, submitted_at), result in zip(batch, results):
+            if not future.done():  # The caller may have disconnected meanwhile
+                future.set_result(RealtimeTranscriptionResponse(
+                    text=result["text"],
+                    language=result["language"],
+                    language_probability=result["language_probability"],
+                    processing_time_seconds=round(finished_at - submitted_at, 3)
+                ))
+
+
+@lru_cache(maxsize=1)
 def get_transcription_service() -> TranscriptionService:
     """
-    Get the global transcription service instance.
+    Get the shared transcription service instance.
     
-    This function can be used as a FastAPI dependency to inject
-    the transcription service into route handlers.
+    The service and its thread pools are created on first use rather
+    than at import time, so processes that never transcribe (or only
+    serve health checks) don't pay for them. This function can be used
+    as a FastAPI dependency to inject the transcription service into
+    route handlers.
+    
+    Returns:
+        TranscriptionService: The shared transcription service instance
+    """
+    return TranscriptionService()
+
+
+@lru_cache(maxsize=1)
+def get_stream_batcher() -> StreamTranscriptionBatcher:
+    """
+    Get the shared real-time transcription batcher.
     
     Returns:
-        TranscriptionService: The global transcription service instance
+        StreamTranscriptionBatcher: The batcher shared by all websocket connections
     """
-    return transcription_service
\ No newline at end of file
+    settings = get_settings()
+    return StreamTranscriptionBatcher(
+        get_transcription_service(),
+        max_batch_size=settings.stream_batch_size,
+        max_wait_ms=settings.stream_batch_wait_ms
+    )
@@ -2,8 +2,9 @@ import time
 import os
 from typing import List
 
-from rq.job import Job
-from rq import Queue
+from rq.defaults import DEFAULT_RESULT_TTL
+from rq.job import Job, JobStatus
+from rq.results import Result
 
 from app.core.config import get_settings
 from app.core.logging import get_logger, setup_logging
@@ -20,7 +21,7 @@ settings = get_settings()
 logger.info("Batch worker starting up, loading model...")
 try:
     model_manager = get_model_manager()
-    model_manager.load_model()
+    model_manager.load_model(sequential=True)  # Batches are transcribed one at a time
     logger.info("Model loaded successfully for batch worker.")
 except Exception as e:
     logger.critical(f"Failed to load model in batch worker: {e}", exc_info=True)
@@ -28,6 +29,17 @@ except Exception as e:
 
 transcription_service = TranscriptionService(use_thread_pool=False)
 
+# LPOP up to ARGV[1] job IDs from the queue list (KEYS[1]) in one atomic step
+DEQUEUE_BATCH_LUA = """
+local ids = {}
+for i = 1, tonumber(ARGV[1]) do
+    local id = redis.call('LPOP', KEYS[1])
+    if not id then break end
+    ids[#ids + 1] = id
+end
+return ids
+"""
+
 def process_batch(jobs: List[Job]):
     """
     Process a batch of transcription jobs.
@@ -39,37 +51,53 @@ def process_batch(jobs: List[Job]):
     job_ids = [job.id for job in jobs]
     logger.info(f"Processing batch of {batch_size} jobs: {job_ids}")
 
-    # Update job statuses to 'started'
-    for job in jobs:
-        job.set_status('started')
-        job.save_meta()
+    # Mark the whole batch as started in one round trip
+    connection = get_redis_connection()
+    with connection.pipeline() as pipeline:
+        for job in jobs:
+            job.set_status(JobStatus.STARTED, pipeline=pipeline)
+        pipeline.execute()
 
     try:
         file_paths = [job.args[0] for job in jobs]
         transcription_results = transcription_service.transcribe_batch(file_paths)
 
-        # Save results for each job
-        for i, job in enumerate(jobs):
-            result = transcription_results[i]
-            job.result = result
-            job.set_status('finished')
-            job.save()
-            logger.info(f"Job {job.id} finished successfully.")
-
-            # Clean up the audio file
+        # Store every result and mark the jobs finished in one round trip
+        with connection.pipeline() as pipeline:
+            for job, result in zip(jobs, transcription_results):
+                result_ttl = job.get_result_ttl(DEFAULT_RESULT_TTL)
+                job.set_status(JobStatus.FINISHED, pipeline=pipeline)
+                Result.create(job, Result.Type.SUCCESSFUL, ttl=result_ttl, return_value=result, pipeline=pipeline)
+                if result_ttl != 0:
+                    job.finished_job_registry.add(job, result_ttl, pipeline=pipeline)
+            pipeline.execute()
+        logger.info(f"Jobs {job_ids} finished successfully.")
+
+        # Clean up the audio files
+        for file_path in file_paths:
             try:
-                if os.path.exists(file_paths[i]):
-                    os.unlink(file_paths[i])
-                    logger.debug(f"Cleaned up audio file: {file_paths[i]}")
+                os.unlink(file_path)
+                logger.debug(f"Cleaned up audio file: {file_path}")
+            except FileNotFoundError:
+                pass
             except OSError as e:
-                logger.warning(f"Failed to clean up audio file {file_paths[i]}: {e}")
+                logger.warning(f"Failed to clean up audio file {file_path}: {e}")
 
     except Exception as e:
-        logger.error(f"Batch processing failed: {e}", exc_info=True)
-        for job in jobs:
-            job.set_status('failed')
-            job.exc_info = str(e)
-            job.save()
+        if batch_size > 1:
+            # Retry each job on its own so one bad file doesn't fail the whole batch
+            logger.warning(f"Batch of jobs {job_ids} failed, retrying them one at a time: {e}")
+            for job in jobs:
+                process_batch([job])
+            return
+
+        logger.error(f"Job {job_ids[0]} failed: {e}", exc_info=True)
+        with connection.pipeline() as pipeline:
+            for job in jobs:
+                job.set_status(JobStatus.FAILED, pipeline=pipeline)
+                job.failed_job_registry.add(job, ttl=job.failure_ttl, exc_string=str(e), pipeline=pipeline)
+                Result.create_failure(job, job.failure_ttl, exc_string=str(e), pipeline=pipeline)
+            pipeline.execute()
 
 def main():
     """
@@ -77,24 +105,23 @@ def main():
     """
     logger.info("Batch worker started. Listening for jobs...")
     queue = get_queue()
+    connection = get_redis_connection()
+    dequeue_batch = connection.register_script(DEQUEUE_BATCH_LUA)
 
     while True:
         try:
-            # Get a batch of jobs from the queue
-            # This pulls up to BATCH_SIZE jobs that are currently queued
-            job_ids = queue.get_job_ids()
-            if not job_ids:
-                time.sleep(settings.batch_timeout)
+            # Block until a job is queued, waking as soon as one arrives
+            first = connection.blpop([queue.key], timeout=settings.batch_timeout)
+            if first is None:
                 continue
 
-            num_jobs_to_pull = min(len(job_ids), settings.batch_size)
-            jobs_to_process = [Job.fetch(job_id, connection=get_redis_connection()) for job_id in job_ids[:num_jobs_to_pull]]
-            
-            # We need to dequeue the jobs we are about to process
-            # This is a simplification. A more robust solution would handle
-            # potential race conditions if multiple workers are running.
-            for job in jobs_to_process:
-                queue.connection.lrem(queue.key, 1, job.id)
+            # Atomically pop up to BATCH_SIZE - 1 more queued job IDs in one round trip,
+            # so concurrent batch workers never pick up the same job
+            more = dequeue_batch(keys=[queue.key], args=[settings.batch_size - 1])
+            job_ids = [job_id.decode() for job_id in (first[1], *more)]
+
+            jobs = Job.fetch_many(job_ids, connection=connection)
+            jobs_to_process = [job for job in jobs if job is not None]
 
             process_batch(jobs_to_process)
 
@@ -0,0 +1,32 @@
+"""
+Gunicorn configuration for running the API with several worker processes.
+
+Usage:
+    gunicorn main:app -c gunicorn_conf.py
+
+The application is imported once in the master and forked into the workers,
+so the imported code (FastAPI, CTranslate2, ONNX Runtime) is shared
+copy-on-write. The Whisper model is deliberately not loaded at import time:
+CUDA contexts and CTranslate2's thread pools do not survive a fork, so each
+worker loads its own model in the application lifespan after it has forked.
+Keep that in mind when sizing WEB_CONCURRENCY, since every worker holds a
+model in memory and runs its own faster-whisper workers.
+"""
+
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+
+# Import the app before forking so workers start without re-importing it
+preload_app = True
+
+worker_class = "uvicorn.workers.UvicornWorker"
+# A single process by default: each one runs its own Whisper workers, which the
+# settings size to the cores divided by WEB_CONCURRENCY, so the two stay in step
+workers = int(os.getenv("WEB_CONCURRENCY", 1))
+
+# Workers only report as alive once the lifespan has finished, which includes
+# loading (and possibly downloading) the model, so allow for a slow start
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 300))
+graceful_timeout = 30
+keepalive = 5
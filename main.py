@@ -6,24 +6,30 @@ necessary middleware, routers, exception handlers, and startup events.
 It serves as the production-ready entry point for the STT service.
 """
 
-import time
-import shutil
+import os
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, Request
+import orjson
+from anyio import to_thread
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from faster_whisper.vad import get_vad_model
 
 from app.core.config import get_settings
 from app.core.exceptions import (
     STTException,
-    general_exception_handler,
     http_exception_handler,
     stt_exception_handler,
 )
 from app.core.logging import get_logger, setup_logging
-from app.models.whisper import initialize_model
-from app.routers.transcription import router as transcription_router
+from app.middleware.timing import RequestTimingMiddleware
+from app.models.schemas import (
+    HealthResponse, JobStatusResponse, JobSubmitResponse, TranscriptionResponse
+)
+from app.models.whisper import get_model_manager, initialize_model, warmup_model
+from app.routers.transcription import SHARED_AUDIO_PATH, router as transcription_router
 from app.routers.websocket import router as websocket_router
 
 # Initialize logging first
@@ -32,13 +38,13 @@ logger = get_logger(__name__)
 
 # Get application settings
 settings = get_settings()
+APP_NAME, APP_VERSION = settings.app_name, settings.app_version
 
-def check_ffmpeg():
-    """Check if FFmpeg executable is available in the system's PATH."""
-    if not shutil.which("ffmpeg"):
-        logger.critical("FFmpeg not found. Please install FFmpeg and ensure it is in your PATH.")
-        raise RuntimeError("FFmpeg not found. The application cannot start.")
-    logger.info("FFmpeg found, proceeding with application startup.")
+def warm_schemas(app: FastAPI) -> None:
+    """Build response model JSON schemas and the OpenAPI document ahead of traffic."""
+    for model in (TranscriptionResponse, JobStatusResponse, JobSubmitResponse, HealthResponse):
+        model.model_json_schema()
+    app.openapi()  # FastAPI caches the generated document on the app
 
 
 
@@ -55,14 +61,20 @@ async def lifespan(app: FastAPI):
         app: The FastAPI application instance
     """
     # Startup
-    check_ffmpeg() # Ensure FFmpeg is available for audio processing
-    logger.info(f"Starting {settings.app_name} v{settings.app_version}")
+    os.makedirs(SHARED_AUDIO_PATH, exist_ok=True)  # Upload target shared with the workers
+    logger.info(f"Starting {APP_NAME} v{APP_VERSION}")
     logger.info(f"Configuration: Device={settings.device}, Model={settings.model_size}")
+    warm_schemas(app)
+    # Size the threadpool used by run_in_threadpool in the routes
+    to_thread.current_default_thread_limiter().total_tokens = settings.threadpool_max_threads
     
     try:
         # Initialize the Whisper model (configurable)
         if settings.load_model_on_startup:
             await initialize_model()
+            get_vad_model()  # Load the shared Silero VAD session before the first websocket connects
+            if settings.warmup_on_startup:
+                await warmup_model()
             logger.info("Application startup completed successfully")
         else:
             logger.info("Skipping model load on startup (load_model_on_startup=False)")
@@ -80,7 +92,7 @@ async def lifespan(app: FastAPI):
 
 # Create FastAPI application with lifespan management
 app = FastAPI(
-    title=settings.app_name,
+    title=APP_NAME,
     description="""
     A high-performance Speech-to-Text (STT) API built with FastAPI and faster-whisper.
     
@@ -105,26 +117,43 @@ app = FastAPI(
     * Supported formats: Audio files only
     * Rate limiting: Applied per client IP
     """,
-    version=settings.app_version,
+    version=APP_VERSION,
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/api/v1/openapi.json",
+    default_response_class=ORJSONResponse,  # Serialize every JSON response with orjson
     lifespan=lifespan
 )
 
+# Share process-wide singletons with route handlers via the application state
+app.state.settings = settings
+app.state.model_manager = get_model_manager()
+
 # Add CORS middleware for cross-origin requests
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Configure appropriately for production
-    allow_credentials=True,
+    allow_origins=settings.parsed_cors_origins,  # Configure with CORS_ORIGINS for production
+    allow_credentials=False,  # The API uses no cookies or HTTP auth
     allow_methods=["GET", "POST"],
     allow_headers=["*"],
 )
 
+# Profile requests with ?profile=1 when enabled (requires pyinstrument)
+if settings.profiling_enabled:
+    from app.middleware.profiling import ProfilingMiddleware
+    app.add_middleware(ProfilingMiddleware)
+
+# Compress large responses such as transcription results; small bodies are sent as-is
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+# Log requests; added last so it is the outermost middleware and times CORS too
+app.add_middleware(RequestTimingMiddleware, sample_rate=settings.log_sample_rate)
+
 
 # Add custom exception handlers
 app.add_exception_handler(STTException, stt_exception_handler)  # type: ignore
-app.add_exception_handler(Exception, general_exception_handler)  # type: ignore
+# Unhandled exceptions fall through to Starlette's ServerErrorMiddleware, which
+# returns a plain 500 and re-raises so the server logs the traceback
 
 
 # Include API routers
@@ -132,80 +161,55 @@ app.include_router(transcription_router)
 app.include_router(websocket_router)
 
 
+# Invariant response bodies, serialized once at import
+_ROOT_BYTES = orjson.dumps({
+    "message": f"Welcome to {APP_NAME}",
+    "version": APP_VERSION,
+    "docs_url": "/docs",
+    "health_check": "/api/v1/health",
+    "transcription_endpoint": "/api/v1/transcribe"
+})
+_PING_BYTES = orjson.dumps({"message": "pong"})
+
+
 @app.get("/", tags=["root"])
-async def root() -> dict:
+async def root() -> Response:
     """
     Root endpoint providing basic API information.
     
     Returns:
-        dict: Basic information about the API
+        Response: Pre-rendered JSON with basic information about the API
     """
-    return {
-        "message": f"Welcome to {settings.app_name}",
-        "version": settings.app_version,
-        "docs_url": "/docs",
-        "health_check": "/api/v1/health",
-        "transcription_endpoint": "/api/v1/transcribe"
-    }
+    return Response(content=_ROOT_BYTES, media_type="application/json")
 
 
 @app.get("/ping", tags=["health"])
-async def ping() -> dict:
+async def ping() -> Response:
     """
     Simple ping endpoint for basic health checks.
     
     Returns:
-        dict: Simple pong response
-    """
-    return {"message": "pong"}
-
-
-# Middleware for request logging (optional)
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    """
-    Log incoming requests for monitoring and debugging.
-    
-    Args:
-        request: The incoming HTTP request
-        call_next: The next middleware or route handler
-        
-    Returns:
-        Response: The response from the next handler
+        Response: Pre-rendered JSON pong response
     """
-    start_time = time.perf_counter()
-    
-    # Process the request
-    response = await call_next(request)
-    
-    # Log request details
-    process_time = time.perf_counter() - start_time
-    logger.info(
-        f"{request.method} {request.url.path} - "
-        f"Status: {response.status_code} - "
-        f"Time: {process_time:.3f}s",
-        extra={
-            "method": request.method,
-            "path": request.url.path,
-            "status_code": response.status_code,
-            "process_time": process_time,
-            "client_ip": request.client.host if request.client else "unknown"
-        }
-    )
-    
-    return response
+    return Response(content=_PING_BYTES, media_type="application/json")
 
 
 if __name__ == "__main__":
     # This block allows running the application directly with: python main.py
     # For production, use: fastapi run main.py or uvicorn main:app
+    import platform
+
     import uvicorn
     
-    logger.info(f"Starting {settings.app_name} in development mode")
+    logger.info(f"Starting {APP_NAME} in development mode")
     uvicorn.run(
         "main:app",
         host=settings.host,
         port=settings.port,
         reload=settings.debug,
-        log_level=settings.log_level.lower()
+        log_level=settings.log_level.lower(),
+        # uvloop and httptools are C implementations of the event loop and HTTP parser
+        loop="uvloop" if platform.system() != "Windows" else "asyncio",
+        http="httptools",
+        interface="asgi3"
     )
@@ -5,19 +5,70 @@ This file demonstrates how to test the API endpoints and can serve
 as a starting point for comprehensive test suites.
 """
 
-import asyncio
-import pytest
-from fastapi.testclient import TestClient
+import io
 
+import fakeredis
+import pytest
+import pytest_asyncio
+from fastapi import UploadFile
+from httpx import ASGITransport, AsyncClient
+from rq import Queue
+from rq.job import JobStatus
+from rq.results import Result
+
+import app.routers.transcription as transcription_router
+from app.core.config import Settings
+from app.core.exceptions import FileValidationException
+from app.core.queue import get_redis_connection
 from main import app
+from worker import transcribe_job
+
+# All tests share one event loop and one client for the module
+pytestmark = pytest.mark.asyncio(scope="module")
+
+
+@pytest_asyncio.fixture(scope="module")
+async def client():
+    """Client calling the ASGI app directly on the test's event loop."""
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as c:
+        yield c
+
+
+@pytest.fixture
+def redis_conn():
+    """Serve the job endpoints from fakeredis, with an empty result cache."""
+    conn = fakeredis.FakeStrictRedis()
+    app.dependency_overrides[get_redis_connection] = lambda: conn
+    transcription_router._finished_results.clear()
+    yield conn
+    app.dependency_overrides.pop(get_redis_connection, None)
+    transcription_router._finished_results.clear()
+
+
+TRANSCRIPTION_RESULT = {
+    "text": "halo dunia",
+    "language": "id",
+    "language_probability": 0.99,
+    "processing_time_seconds": 1.5,
+}
+
 
-# Create test client
-client = TestClient(app)
+def enqueue_job(conn, finished: bool = False):
+    """Enqueue a transcription job, optionally finishing it with a result."""
+    job = Queue(connection=conn).enqueue(transcribe_job, "audio.wav", result_ttl=3600)
+    if finished:
+        finish_job(job)
+    return job
 
 
-def test_root_endpoint():
+def finish_job(job):
+    job.set_status(JobStatus.FINISHED)
+    Result.create(job, Result.Type.SUCCESSFUL, ttl=3600, return_value=TRANSCRIPTION_RESULT)
+
+
+async def test_root_endpoint(client):
     """Test the root endpoint returns expected information."""
-    response = client.get("/")
+    response = await client.get("/")
     assert response.status_code == 200
     data = response.json()
     assert "message" in data
@@ -25,17 +76,17 @@ def test_root_endpoint():
     assert "docs_url" in data
 
 
-def test_ping_endpoint():
+async def test_ping_endpoint(client):
     """Test the ping endpoint for basic health check."""
-    response = client.get("/ping")
+    response = await client.get("/ping")
     assert response.status_code == 200
     data = response.json()
     assert data["message"] == "pong"
 
 
-def test_health_endpoint():
+async def test_health_endpoint(client):
     """Test the health check endpoint."""
-    response = client.get("/api/v1/health")
+    response = await client.get("/api/v1/health")
     assert response.status_code == 200
     data = response.json()
     assert "status" in data
@@ -44,9 +95,9 @@ def test_health_endpoint():
     assert "device" in data
 
 
-def test_model_info_endpoint():
+async def test_model_info_endpoint(client):
     """Test the model info endpoint."""
-    response = client.get("/api/v1/model-info")
+    response = await client.get("/api/v1/model-info")
     assert response.status_code == 200
     data = response.json()
     assert "model_size" in data
@@ -55,28 +106,132 @@ def test_model_info_endpoint():
     assert "is_loaded" in data
 
 
-def test_transcribe_no_file():
+async def test_transcribe_no_file(client):
     """Test transcription endpoint without file."""
-    response = client.post("/api/v1/transcribe")
+    response = await client.post("/api/v1/transcribe")
     assert response.status_code == 422  # Unprocessable Entity
 
 
-def test_transcribe_invalid_file():
+async def test_transcribe_invalid_file(client):
     """Test transcription endpoint with invalid file."""
     # Create a fake text file
     files = {"audio_file": ("test.txt", "not an audio file", "text/plain")}
-    response = client.post("/api/v1/transcribe", files=files)
+    response = await client.post("/api/v1/transcribe", files=files)
     assert response.status_code == 400  # Bad Request
 
 
+async def test_jobs_batch_too_many_ids(client):
+    """Test the batch job status endpoint rejects oversized ID lists."""
+    ids = ",".join(f"job-{i}" for i in range(101))
+    response = await client.get("/api/v1/jobs", params={"ids": ids})
+    assert response.status_code == 400
+
+
+async def test_job_status_not_modified(client, redis_conn):
+    """Test a repeated poll of an unchanged job gets a bodiless 304."""
+    job = enqueue_job(redis_conn)
+
+    response = await client.get(f"/api/v1/jobs/{job.id}")
+    assert response.status_code == 200
+    assert response.json()["status"] == "queued"
+    assert response.headers["cache-control"] == "no-cache"
+    etag = response.headers["etag"]
+    assert etag == f'"{job.id}:queued"'
+
+    response = await client.get(f"/api/v1/jobs/{job.id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    # Once the job finishes, the old ETag no longer matches
+    finish_job(job)
+    response = await client.get(f"/api/v1/jobs/{job.id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] == f'"{job.id}:finished"'
+    assert response.json()["result"] == TRANSCRIPTION_RESULT
+
+
+async def test_job_status_not_found(client, redis_conn):
+    """Test polling an unknown job returns 404."""
+    response = await client.get("/api/v1/jobs/missing")
+    assert response.status_code == 404
+
+
+async def test_jobs_batch_status(client, redis_conn):
+    """Test the batch job status endpoint reports every requested job."""
+    finished = enqueue_job(redis_conn, finished=True)
+    queued = enqueue_job(redis_conn)
+
+    response = await client.get("/api/v1/jobs", params={"ids": f"{finished.id},{queued.id},missing"})
+    assert response.status_code == 200
+    assert response.json() == [
+        {"job_id": finished.id, "status": "finished", "result": TRANSCRIPTION_RESULT},
+        {"job_id": queued.id, "status": "queued", "result": None},
+        {"job_id": "missing", "status": "not_found", "result": None},
+    ]
+
+
+async def test_finished_result_served_from_cache(client, redis_conn):
+    """Test a finished job's result is read from Redis only once."""
+    job = enqueue_job(redis_conn, finished=True)
+
+    response = await client.get(f"/api/v1/jobs/{job.id}")
+    assert response.json()["result"] == TRANSCRIPTION_RESULT
+
+    # Later polls, single or batched, no longer need the stored result
+    redis_conn.delete(Result.get_key(job.id))
+    response = await client.get(f"/api/v1/jobs/{job.id}")
+    assert response.json()["result"] == TRANSCRIPTION_RESULT
+    response = await client.get("/api/v1/jobs", params={"ids": job.id})
+    assert response.json()[0]["result"] == TRANSCRIPTION_RESULT
+
+
+async def test_finished_result_cache_evicts_least_recently_used(client, redis_conn, monkeypatch):
+    """Test the result cache keeps only the most recently polled jobs."""
+    monkeypatch.setattr(transcription_router, "FINISHED_RESULT_CACHE_SIZE", 2)
+    first, second, third = (enqueue_job(redis_conn, finished=True) for _ in range(3))
+
+    for job in (first, second, first, third):
+        await client.get(f"/api/v1/jobs/{job.id}")
+
+    assert list(transcription_router._finished_results) == [first.id, third.id]
+
+
+@pytest.fixture
+def small_upload_limit(monkeypatch, tmp_path):
+    """Limit uploads to 1MB and save them to a temporary directory."""
+    settings = Settings(max_file_size_mb=1)
+    monkeypatch.setattr(transcription_router, "SHARED_AUDIO_PATH", str(tmp_path))
+    app.dependency_overrides[transcription_router.get_app_settings] = lambda: settings
+    yield settings
+    app.dependency_overrides.pop(transcription_router.get_app_settings, None)
+
+
+async def test_transcribe_oversized_file(client, small_upload_limit, tmp_path):
+    """Test an upload over the size limit is rejected without being saved."""
+    files = {"audio_file": ("big.wav", b"0" * (small_upload_limit.max_file_size_bytes + 1), "audio/wav")}
+    response = await client.post("/api/v1/transcribe", files=files)
+    assert response.status_code == 400
+    assert list(tmp_path.iterdir()) == []
+
+
+async def test_save_upload_stops_at_size_limit(small_upload_limit, tmp_path):
+    """Test the chunked save aborts and removes the partial file once over the limit."""
+    # No declared size, as with a streamed upload, so only the running byte count catches it
+    data = io.BytesIO(b"0" * (small_upload_limit.max_file_size_bytes + 1))
+    upload = UploadFile(file=data, filename="big.wav")
+    with pytest.raises(FileValidationException):
+        await transcription_router._save_upload_file(upload, small_upload_limit)
+    assert list(tmp_path.iterdir()) == []
+
+
 # Note: To test actual audio transcription, you would need real audio files
 # and the model to be loaded. Here's an example of how that would look:
 
-# def test_transcribe_valid_audio():
+# async def test_transcribe_valid_audio(client):
 #     """Test transcription with valid audio file."""
 #     with open("test_audio.wav", "rb") as audio_file:
 #         files = {"audio_file": ("test_audio.wav", audio_file, "audio/wav")}
-#         response = client.post("/api/v1/transcribe", files=files)
+#         response = await client.post("/api/v1/transcribe", files=files)
 #         assert response.status_code == 200
 #         data = response.json()
 #         assert "text" in data
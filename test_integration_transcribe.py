@@ -1,90 +1,86 @@
 """
-Integration-style test for the transcription endpoint using a fake model.
+Integration-style tests for the transcription API using a fake model.
 
-This avoids downloading/loading the real Whisper model by:
-- Stubbing `initialize_model` in app.models.whisper during startup
-- Injecting a FakeModel into the global `transcription_service`
+This avoids downloading/loading the real Whisper model and a real Redis by:
+- Injecting a FakeModelManager through the app state
+- Overriding the RQ queue dependency with a queue on fakeredis
+- Generating the audio (a short sine tone) in the test
 """
 
-from typing import Iterable, Tuple
-
-import importlib
-import os
+import io
+import wave
 
+import fakeredis
+import numpy as np
 import pytest
+from fastapi.testclient import TestClient
+from rq import Queue
 
-
-class FakeSegment:
-    def __init__(self, text: str):
-        self.text = text
-
-
-class FakeInfo:
-    def __init__(self, language: str = "id", language_probability: float = 0.99):
-        self.language = language
-        self.language_probability = language_probability
-
-
-class FakeModel:
-    def transcribe(self, audio: str, **kwargs) -> Tuple[Iterable[FakeSegment], FakeInfo]:
-        return [FakeSegment("Halo dunia"), FakeSegment("ini tes")], FakeInfo()
+import app.routers.transcription as transcription_router
+from app.core.queue import get_queue
+from main import app
+from worker import transcribe_job
 
 
 class FakeModelManager:
     def __init__(self):
-        self._model = FakeModel()
-        self.is_loaded = True
-
-    @property
-    def model(self) -> FakeModel:
-        return self._model
-
-    def load_model(self) -> None:  # no-op
         self.is_loaded = True
 
     def get_model_info(self) -> dict:
         return {"model_size": "small", "device": "cpu", "compute_type": "float32", "is_loaded": True}
 
 
-@pytest.fixture
-def client(monkeypatch):
-    # Ensure CPU-friendly defaults for the test environment
-    monkeypatch.setenv("DEVICE", "cpu")
-    monkeypatch.setenv("LOAD_MODEL_ON_STARTUP", "false")
+def make_tone_wav(seconds: float = 1.0, frequency: float = 440.0, sample_rate: int = 16000) -> bytes:
+    """Render a mono 16-bit WAV file containing a sine tone."""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    samples = (0.5 * np.sin(2 * np.pi * frequency * t) * 32767).astype(np.int16)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(samples.tobytes())
+    return buffer.getvalue()
 
-    # Stub out model initialization at startup
-    import app.models.whisper as whisper
 
-    async def _noop_init():  # async no-op
-        return None
+@pytest.fixture
+def queue():
+    return Queue(connection=fakeredis.FakeStrictRedis())
 
-    monkeypatch.setattr(whisper, "initialize_model", _noop_init)
 
-    # Inject fake model into the global transcription service
-    import app.services.transcription as svc
+@pytest.fixture
+def client(monkeypatch, tmp_path, queue):
+    monkeypatch.setattr(app.state, "model_manager", FakeModelManager())
+    monkeypatch.setattr(transcription_router, "SHARED_AUDIO_PATH", str(tmp_path))
+    app.dependency_overrides[get_queue] = lambda: queue
+    # Not used as a context manager, so the lifespan (and model loading) never runs
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_queue, None)
+
 
-    svc.transcription_service._model_manager = FakeModelManager()  # type: ignore[attr-defined]
+def test_transcribe_enqueues_job(client, queue, tmp_path):
+    audio = make_tone_wav()
 
-    # Import app only after patches are in place
-    main = importlib.import_module("main")
-    from fastapi.testclient import TestClient
+    resp = client.post("/api/v1/transcribe", files={"audio_file": ("tone.wav", audio, "audio/wav")})
 
-    return TestClient(main.app)
+    assert resp.status_code == 202
+    job_id = resp.json()["job_id"]
+    job = queue.fetch_job(job_id)
+    assert job is not None
+    assert job.func == transcribe_job
+    assert job.result_ttl == 3600
 
+    # The upload was saved to the shared directory for the worker to pick up
+    (file_path,) = job.args
+    assert file_path.startswith(str(tmp_path))
+    with open(file_path, "rb") as f:
+        assert f.read() == audio
 
-def test_transcribe_with_fake_model(client):
-    # Use the provided small sample audio in the repo
-    audio_path = os.path.join(os.getcwd(), "cek-suara-stt.m4a")
-    assert os.path.exists(audio_path), "Sample audio file not found in repository root"
 
-    with open(audio_path, "rb") as f:
-        files = {"audio_file": ("cek-suara-stt.m4a", f, "audio/m4a")}
-        resp = client.post("/api/v1/transcribe", files=files)
+def test_health_reads_injected_model_manager(client):
+    resp = client.get("/api/v1/health")
 
     assert resp.status_code == 200
     data = resp.json()
-    assert data["text"].startswith("Halo dunia")
-    assert data["language"] == "id"
-    assert 0.0 <= data["language_probability"] <= 1.0
-    assert data["processing_time_seconds"] >= 0
-
+    assert data["status"] == "healthy"
+    assert data["model_loaded"] is True
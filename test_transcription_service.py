@@ -0,0 +1,149 @@
+"""
+Unit tests for batched transcription in TranscriptionService.
+
+The batched pipeline is replaced by a fake that mimics faster-whisper:
+one segment per clip, with the start time rounded to milliseconds.
+VAD is stubbed so every input is a single clip, and the fake model
+"detects" Indonesian for positive samples and English for negative ones.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import app.services.transcription as svc
+
+
+class FakeModel:
+    feature_extractor = SimpleNamespace(chunk_length=30)
+    model = SimpleNamespace(is_multilingual=True)
+
+    def detect_language(self, audio):
+        return ("id", 0.9, []) if audio.mean() > 0 else ("en", 0.8, [])
+
+
+class FakePipeline:
+    def __init__(self):
+        self.model = FakeModel()
+        self.calls = []
+
+    def transcribe(self, audio, clip_timestamps, **kwargs):
+        self.calls.append(kwargs)
+        segments = [
+            SimpleNamespace(text=f"clip{index}", start=round(clip["start"] / svc.SAMPLE_RATE, 3))
+            for index, clip in enumerate(clip_timestamps)
+        ]
+        return iter(segments), SimpleNamespace(language=kwargs["language"], language_probability=1)
+
+
+class FakeModelManager:
+    def __init__(self, pipeline):
+        self.batched_pipeline = pipeline
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    monkeypatch.setattr(svc, "get_speech_timestamps", lambda audio, options: [{"start": 0, "end": len(audio)}])
+    monkeypatch.setattr(svc, "merge_segments", lambda segments, options: segments)
+    return FakePipeline()
+
+
+@pytest.fixture
+def service(pipeline):
+    return svc.TranscriptionService(use_thread_pool=False, model_manager=FakeModelManager(pipeline))  # type: ignore[arg-type]
+
+
+def test_batch_maps_clips_of_non_ms_aligned_inputs(service):
+    # 160003 samples is not a whole millisecond, so the second input's offset isn't either
+    audios = [np.full(160003, 0.1, dtype=np.float32), np.full(80000, 0.1, dtype=np.float32)]
+
+    results = service.transcribe_batch(audios)
+
+    assert [result["text"] for result in results] == ["clip0", "clip1"]
+
+
+def test_batch_keeps_inputs_without_speech_empty(service, monkeypatch):
+    monkeypatch.setattr(
+        svc, "get_speech_timestamps",
+        lambda audio, options: [{"start": 0, "end": len(audio)}] if audio.any() else []
+    )
+    audios = [np.zeros(16000, dtype=np.float32), np.full(32001, 0.1, dtype=np.float32)]
+
+    results = service.transcribe_batch(audios)
+
+    assert [result["text"] for result in results] == ["", "clip0"]
+    assert results[0]["language"] == ""
+
+
+def test_batch_detects_language_per_input(service, pipeline):
+    audios = [
+        np.full(16000, 0.1, dtype=np.float32),
+        np.full(16000, -0.1, dtype=np.float32),
+        np.full(16000, 0.1, dtype=np.float32),
+    ]
+
+    results = service.transcribe_batch(audios)
+
+    # One batched pass per language, each decoding only that language's inputs
+    assert [call["language"] for call in pipeline.calls] == ["id", "en"]
+    assert [(result["text"], result["language"]) for result in results] == [
+        ("clip0", "id"), ("clip0", "en"), ("clip1", "id")
+    ]
+    assert [result["language_probability"] for result in results] == [0.9, 0.8, 0.9]
+
+
+class FlakyStreamService:
+    """Returns a malformed result for the first batch, then well-formed ones."""
+
+    def __init__(self):
+        self.batches = 0
+
+    async def transcribe_stream_batch(self, audios):
+        self.batches += 1
+        if self.batches == 1:
+            return [{} for _ in audios]
+        return [{"text": "ok", "language": "id", "language_probability": 0.9} for _ in audios]
+
+
+def test_stream_batcher_survives_failing_batch():
+    async def run():
+        batcher = svc.StreamTranscriptionBatcher(FlakyStreamService(), max_batch_size=4, max_wait_ms=1)  # type: ignore[arg-type]
+        audio = np.zeros(16000, dtype=np.float32)
+        with pytest.raises(svc.TranscriptionException):
+            await batcher.submit(audio)
+        return await asyncio.wait_for(batcher.submit(audio), timeout=5)
+
+    assert asyncio.run(run()).text == "ok"
+
+
+class PoisonedStreamService:
+    """Fails any batch containing a silent input, like a model error on one stream."""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    async def transcribe_stream_batch(self, audios):
+        self.batch_sizes.append(len(audios))
+        if any(not audio.any() for audio in audios):
+            raise RuntimeError("bad input")
+        return [{"text": "ok", "language": "id", "language_probability": 0.9} for _ in audios]
+
+
+def test_stream_batcher_retries_failed_batch_per_input():
+    service = PoisonedStreamService()
+
+    async def run():
+        batcher = svc.StreamTranscriptionBatcher(service, max_batch_size=4, max_wait_ms=50)  # type: ignore[arg-type]
+        return await asyncio.gather(
+            batcher.submit(np.full(16000, 0.1, dtype=np.float32)),
+            batcher.submit(np.zeros(16000, dtype=np.float32)),
+            return_exceptions=True
+        )
+
+    good, bad = asyncio.run(run())
+    # Only the poisoned input fails; the one batched with it is retried alone
+    assert good.text == "ok"
+    assert isinstance(bad, svc.TranscriptionException)
+    assert service.batch_sizes == [2, 1, 1]
@@ -0,0 +1,90 @@
+"""
+Tests for the real-time transcription websocket.
+
+The app's lifespan is not run, so no Whisper model is loaded; these tests
+only exercise the stream decoding path.
+"""
+
+import asyncio
+import io
+import threading
+
+import av
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.routers.websocket import CHUNK_SIZE, SAMPLE_RATE, AudioTranscoder, SileroVadBatcher, _ChunkStream
+from main import app
+
+
+def make_webm_tone(seconds: float) -> bytes:
+    """Encode a sine tone as a mono WebM/Opus stream, like a browser MediaRecorder."""
+    rate = 48000
+    t = np.arange(int(seconds * rate)) / rate
+    samples = (0.3 * np.sin(2 * np.pi * 440 * t) * 32767).astype(np.int16)[np.newaxis, :]
+    buffer = io.BytesIO()
+    with av.open(buffer, "w", format="webm") as container:
+        stream = container.add_stream("libopus", rate=rate)
+        stream.layout = "mono"
+        frame = av.AudioFrame.from_ndarray(samples, format="s16", layout="mono")
+        frame.rate = rate
+        for packet in stream.encode(frame):
+            container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+    return buffer.getvalue()
+
+
+def test_undecodable_stream_is_reported_and_closed():
+    client = TestClient(app)
+    with client.websocket_connect("/ws/transcribe") as websocket:
+        websocket.send_bytes(np.random.default_rng(0).bytes(16384))  # Noise, not a WebM header
+        assert "error" in websocket.receive_json()
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            websocket.receive_json()
+    assert exc_info.value.code == 1003
+
+
+def test_chunk_stream_rejects_chunks_beyond_its_bound():
+    stream = _ChunkStream(max_chunks=2)
+    assert stream.feed(b"a") and stream.feed(b"b")
+    assert not stream.feed(b"c")
+
+    stream.close()  # The end-of-stream sentinel is accepted even when full
+    assert stream.read() == b"a"
+    assert stream.read() == b"b"
+    assert stream.read() == b""
+
+
+def test_vad_flush_scores_partial_batch():
+    vad = SileroVadBatcher()
+    for _ in range(5):
+        assert vad.push(bytes(CHUNK_SIZE * 2)) is None
+
+    frames, is_speech = vad.flush()
+    assert frames.shape == (5, CHUNK_SIZE)
+    assert is_speech.shape == (5,) and not is_speech.any()
+    assert vad.flush() is None
+
+
+def test_decoder_thread_scores_every_frame():
+    """Every decoded frame gets a VAD decision, including a trailing partial batch."""
+    seconds = 1.25
+
+    async def decode():
+        transcoder = AudioTranscoder(websocket=None)  # type: ignore[arg-type]
+        transcoder._loop = asyncio.get_running_loop()
+        transcoder._stream.feed(make_webm_tone(seconds))
+        transcoder._stream.close()
+        decoder = threading.Thread(target=transcoder._decode_stream)
+        decoder.start()
+        frames = 0
+        while (decisions := await transcoder._decisions.get()) is not None:
+            frames += len(decisions[0])
+        decoder.join()
+        return frames
+
+    # Opus may pad the stream by a few milliseconds
+    assert asyncio.run(decode()) >= int(seconds * SAMPLE_RATE) // CHUNK_SIZE
@@ -1,56 +1,96 @@
-import redis
-from rq import Worker, Queue, Connection
+import threading
+import time
+from typing import Optional
+
+from faster_whisper import BatchedInferencePipeline
+from rq import Queue, SimpleWorker
 
 from app.core.config import get_settings
 from app.core.logging import get_logger, setup_logging
+from app.core.queue import get_redis_connection
 from app.models.whisper import get_model_manager
-from app.services.transcription import TranscriptionService
+from app.services.transcription import extract_text_from_segments
 
 # Setup logging and settings
 setup_logging()
 logger = get_logger(__name__)
 settings = get_settings()
 
-# Synchronously load the model for the worker
-logger.info("Worker starting up, loading model...")
-try:
-    model_manager = get_model_manager()
-    model_manager.load_model()
-    logger.info("Model loaded successfully for worker.")
-except Exception as e:
-    logger.critical(f"Failed to load model in worker: {e}", exc_info=True)
-    exit(1) # Exit if model fails to load
+# Queues to listen on
+listen = ['default']
 
-# Initialize the transcription service without a thread pool
-transcription_service = TranscriptionService(use_thread_pool=False)
+# Batched pipeline bound once by bootstrap(); jobs call faster-whisper directly
+PIPELINE: Optional[BatchedInferencePipeline] = None
+_ready = False
+_bootstrap_lock = threading.Lock()
 
-# Redis connection details
-listen = ['default']
-redis_host = settings.redis_host
-redis_port = settings.redis_port
+def bootstrap():
+    """
+    Load the model for the worker, once.
 
-# Establish connection to Redis
-conn = redis.from_url(f'redis://{redis_host}:{redis_port}')
+    Importing this module (as the API does to enqueue `transcribe_job`)
+    has no side effects; the model is loaded when the worker starts, or
+    by the first job if it runs somewhere bootstrap() wasn't called.
+    """
+    global PIPELINE, _ready
+    if _ready:
+        return
+    with _bootstrap_lock:
+        if _ready:
+            return
+        logger.info("Worker starting up, loading model...")
+        model_manager = get_model_manager()
+        model_manager.load_model(sequential=True)  # SimpleWorker runs one job at a time
+        PIPELINE = model_manager.batched_pipeline
+        _ready = True
+        logger.info("Model loaded successfully for worker.")
 
 def transcribe_job(file_path: str):
     """
     The job function that the RQ worker will execute.
     This function performs the transcription of a single audio file.
     """
+    bootstrap()
     logger.info(f"Starting transcription job for: {file_path}")
+    start_time = time.perf_counter()
     try:
-        result = transcription_service.transcribe_file_from_path(file_path)
-        logger.info(f"Finished transcription job for: {file_path}")
-        return result
+        segments, info = PIPELINE.transcribe(
+            file_path,
+            beam_size=settings.beam_size,
+            batch_size=settings.whisper_batch_size,
+            vad_filter=True,
+            vad_parameters=dict(min_silence_duration_ms=500),
+            condition_on_previous_text=False,  # Chunks are decoded independently
+            word_timestamps=False
+        )
+        text = extract_text_from_segments(segments)
+        processing_time = time.perf_counter() - start_time
+        logger.info(f"Finished transcription job for: {file_path} in {processing_time:.2f}s")
+        return {
+            "text": text,
+            "language": info.language,
+            "language_probability": info.language_probability,
+            "processing_time_seconds": round(processing_time, 3)
+        }
     except Exception as e:
         logger.error(f"Transcription job failed for {file_path}: {e}", exc_info=True)
         # Re-raising the exception will mark the job as failed in RQ
         raise
 
 if __name__ == "__main__":
-    with Connection(conn):
-        # Create a worker that listens on the specified queues
-        worker = Worker(map(Queue, listen))
-        logger.info(f"RQ Worker starting... Listening on queues: {', '.join(listen)}")
-        # The `work` method is blocking and will start processing jobs
-        worker.work()
\ No newline at end of file
+    # Synchronously load the model before taking jobs
+    try:
+        bootstrap()
+    except Exception as e:
+        logger.critical(f"Failed to load model in worker: {e}", exc_info=True)
+        exit(1) # Exit if model fails to load
+
+    # Redis connection backed by the shared connection pool
+    conn = get_redis_connection()
+
+    # Create a worker that listens on the specified queues. SimpleWorker runs jobs
+    # in this process instead of forking per job, so the loaded model is reused
+    worker = SimpleWorker([Queue(name, connection=conn) for name in listen], connection=conn)
+    logger.info(f"RQ Worker starting... Listening on queues: {', '.join(listen)}")
+    # The `work` method is blocking and will start processing jobs
+    worker.work()